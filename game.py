@@ -3,9 +3,9 @@ import sys
 import random
 
 from scripts.player import Player
-from scripts.utils import load_image, load_images, Animation
+from scripts.utils import load_image, load_images, Animation, LazySound, MIXER_MAX_VOLUME
 from scripts.tilemap import Tilemap
-from scripts.entities import Collectable, Enemy
+from scripts.entities import Collectable, Enemy, NEAR_CELL_SIZE
 from scripts.particle import Particle
 from scripts.hud import HudElement
 
@@ -23,16 +23,99 @@ FADE_SPEED = 8
 DEPTHS_Y = 250
 DEPTHS_X = -300
 DEFAULT_MUSIC_VOLUME = 1.1
+PRELOADED_SFX = ('jump', 'run_grass', 'land')                 # Played within the first seconds, decoded at startup to avoid a hitch on first use
+
+# Spawner tile variants mapped to the collectable they create and whether it blocks the player horizontally
+PLAYER_SPAWNER = 2
+COLLECTABLE_SPAWNERS = {
+    0 : ('respawn', False),
+    1 : ('grub', False),
+    3 : ('cloak_pickup', False),
+    4 : ('claw_pickup', False),
+    5 : ('wings_pickup', False),
+    6 : ('saw', False),
+    7 : ('gate', True),
+    8 : ('lever', False),
+    9 : ('dash_pickup', False),
+    10 : ('shade_gate', True),
+    11 : ('slippery_rock', True),
+}
+
+# Enemy tile variants mapped to the enemy they create, its size, and any extra Enemy keyword arguments
+ENEMY_SPAWNERS = {
+    0 : ('crawlid', (21, 15), {}),
+    1 : ('wall_creeper', (12, 20), {'gravity' : 0, 'vert_flip' : True}),
+}
+
+# Controller button groups, expanded into the controller dispatch tables
+JUMP_BUTTONS = frozenset((0, 1))                        # A, B
+DASH_BUTTONS = frozenset((2, 3, 10))                    # X, Y, RB
+GRUB_FINDER_BUTTONS = frozenset((9, 11, 12, 13, 14))    # LB, DPAD
+
+# Events the game never reads, dropped by SDL before they reach the queue
+BLOCKED_EVENTS = [pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL, pygame.TEXTINPUT, pygame.TEXTEDITING]
+MUSIC_END_EVENT = pygame.USEREVENT + 1                  # Posted by the mixer when the music track stops
+
+# Sound effects as (name, file, volume)
+SFX_SPECS = [
+    ('run_grass',        'sfx/run_grass.wav',              0.2),
+    ('run_stone',        'sfx/run_stone.wav',              0.2),
+    ('jump',             'sfx/jump.wav',                   0.10),
+    ('land',             'sfx/land.wav',                   0.06),
+    ('land_hard',        'sfx/land_hard.wav',              0.10),
+    ('falling',          'sfx/falling.wav',                0.2),
+    ('wings',            'sfx/wings.wav',                  0.2),
+    ('dash',             'sfx/dash.wav',                   0.14),
+    ('cloak',            'sfx/cloak.wav',                  0.08),
+    ('hitstun',          'sfx/damage.wav',                 0.2),
+    ('wall_jump',        'sfx/wall_jump.wav',              0.12),
+    ('wall_slide',       'sfx/wall_slide.wav',             0.12),
+    ('mantis_claw',      'sfx/mantis_claw.wav',            0.15),
+    ('grub_free_1',      'sfx/grub_free_1.wav',            0.2),
+    ('grub_free_2',      'sfx/grub_free_2.wav',            0.2),
+    ('grub_free_3',      'sfx/grub_free_3.wav',            0.3),
+    ('grub_break',       'sfx/grub_break.wav',             0.15),
+    ('grub_burrow',      'sfx/grub_burrow.wav',            0.35),
+    ('grub_alert',       'sfx/grub_alert.wav',             0.3),
+    ('grub_sad_1',       'sfx/grub_sad_1.wav',             0.1),
+    ('grub_sad_idle_1',  'sfx/grub_sad_idle_1.wav',        0.2),
+    ('grub_sad_idle_2',  'sfx/grub_sad_idle_2.wav',        0.2),
+    ('grubfather_1',     'sfx/grubfather_1.wav',           0.015),
+    ('ability_pickup',   'sfx/ability_pickup_boom.wav',    0.35),
+    ('ability_info',     'sfx/ability_info.wav',           0.2),
+    ('dark_spell_get',   'sfx/dark_spell_get.wav',         0.6),
+    ('shiny_item',       'sfx/shiny_item.wav',             0.0),
+    ('saw_loop',         'sfx/saw_loop.wav',               0.0),
+    ('gate',             'sfx/gate.wav',                   0.15),
+    ('lever',            'sfx/lever.wav',                  0.15),
+    ('shade_gate',       'sfx/shade_gate.wav',             0.35),
+    ('shade_gate_repel', 'sfx/shade_gate_repel.wav',       0.3),
+    ('crawler',          'sfx/crawler.wav',                0.05),
+    ('wall_creeper',     'sfx/wall_creeper.wav',           0.05),
+]
 
 class Game:
 
+    # Fixed attribute layout, run() reads most of these every frame
+    __slots__ = ('clock', 'joysticks', 'holding_trigger', 'screen', 'display',
+                 'blackout_surf', 'blackout_alpha', 'blackout_surf_alpha', 'darken_surf', 'darken_alpha', 'darken_surf_alpha',
+                 'damage_fade_in', 'damage_fade_out', 'background_alpha', 'depths_background_alpha',
+                 'assets', 'music_volume', 'music_volume_step', 'sfx', 'sfx_grub_sad', 'sfx_grub_free',
+                 'player_spawn_pos', 'world_spawn_pos', 'player', 'stick_dir',
+                 'keydown_actions', 'keyup_actions', 'joybuttondown_actions', 'joybuttonup_actions',
+                 'tilemap', 'level_select', 'particles', 'particle_pool', 'collectables', 'enemies', 'grubs_collected',
+                 'hud', 'score_text', 'score_text_back', 'score_shown', 'score_img', 'score_img_back',
+                 'scroll', 'playing_timer', 'camera_smooth', 'can_move')
+
     def __init__(self):
 
-        # Initialize pygame
-        pygame.init()
+        # Initialize only the pygame subsystems the game uses
+        pygame.display.init()
+        pygame.font.init()
         self.clock = pygame.time.Clock()
         pygame.mixer.init()
         pygame.mixer.set_num_channels(24)
+        pygame.mixer.music.set_endevent(MUSIC_END_EVENT)
 
         # Initialize controller
         pygame.joystick.init()
@@ -40,28 +123,32 @@ class Game:
         self.holding_trigger = False
 
         # full size screen used for window (container)
-        self.screen = pygame.display.set_mode(SCREEN_SIZE, flags=pygame.SCALED, vsync=1)
+        self.screen = pygame.display.set_mode(SCREEN_SIZE, flags=pygame.SCALED | pygame.DOUBLEBUF, vsync=1)
         pygame.display.set_caption("PixelKnight")
+        pygame.event.set_blocked(BLOCKED_EVENTS)
 
         # Scaled display used for all rendering, scale up to screen before final render
-        self.display = pygame.Surface(DISPLAY_SIZE)
+        # Converted to the screen's pixel format so every blit onto it and the upscale skip format conversion
+        self.display = pygame.Surface(DISPLAY_SIZE).convert()
 
         # Blackout surface for level transition and death effects
-        self.blackout_surf = pygame.Surface(SCREEN_SIZE)
+        self.blackout_surf = pygame.Surface(SCREEN_SIZE).convert()
         self.blackout_surf.fill((0, 0, 0))
-        self.darken_surf = pygame.Surface(SCREEN_SIZE)
+        self.darken_surf = pygame.Surface(DISPLAY_SIZE).convert()   # Drawn onto the display before upscaling, so display sized
         self.darken_surf.fill((0, 0, 0))
         self.damage_fade_in = False
         self.damage_fade_out = False
         self.blackout_alpha = 255                                   # Total blackout during transitions and damage effects
+        self.blackout_surf_alpha = None                             # Alpha last applied to blackout_surf, avoids redundant set_alpha calls
         self.background_alpha = 230                                 # Normal background, hidden in depths
         self.depths_background_alpha = 0                            # Depths background, only visible in bottom left corner
         self.darken_alpha = 0                                       # Slight darkness effect while near void depth   
+        self.darken_surf_alpha = None                               # Alpha last applied to darken_surf, avoids redundant set_alpha calls
 
         # Load image assets
         self.assets = {
-            'background' : load_image('backgrounds/blue_cave.png'),
-            'void_background' : load_image('backgrounds/void_background.png'),
+            'background' : load_image('backgrounds/blue_cave.png', alpha=False),
+            'void_background' : load_image('backgrounds/void_background.png', alpha=False),
             'grub_icon' : load_image('hud/counter/grub_icon.png'),
             'guide_move' : load_image('hud/guide/guide_move.png'),
             'guide_jump' : load_image('hud/guide/guide_jump.png'),
@@ -118,87 +205,58 @@ class Game:
             'enemies/wall_creeper/idle' : Animation(load_images('enemies/wall_creeper/idle'), img_dur=5, loop=True),
         }
 
-        # Load audio assets
+        # Load audio assets, each file is only decoded the first time it plays
         self.music_volume = DEFAULT_MUSIC_VOLUME
-        self.sfx = {
-            'run_grass' : pygame.mixer.Sound('sfx/run_grass.wav'),
-            'run_stone' : pygame.mixer.Sound('sfx/run_stone.wav'),
-            'jump' : pygame.mixer.Sound('sfx/jump.wav'),
-            'land' : pygame.mixer.Sound('sfx/land.wav'),
-            'land_hard' : pygame.mixer.Sound('sfx/land_hard.wav'),
-            'falling' : pygame.mixer.Sound('sfx/falling.wav'),
-            'wings' : pygame.mixer.Sound('sfx/wings.wav'),
-            'dash' : pygame.mixer.Sound('sfx/dash.wav'),
-            'cloak' : pygame.mixer.Sound('sfx/cloak.wav'),
-            'hitstun' : pygame.mixer.Sound('sfx/damage.wav'),
-            'wall_jump' : pygame.mixer.Sound('sfx/wall_jump.wav'),
-            'wall_slide' : pygame.mixer.Sound('sfx/wall_slide.wav'),
-            'mantis_claw' : pygame.mixer.Sound('sfx/mantis_claw.wav'),
-            'grub_free_1' : pygame.mixer.Sound('sfx/grub_free_1.wav'),
-            'grub_free_2' : pygame.mixer.Sound('sfx/grub_free_2.wav'),
-            'grub_free_3' : pygame.mixer.Sound('sfx/grub_free_3.wav'),
-            'grub_break' : pygame.mixer.Sound('sfx/grub_break.wav'),
-            'grub_burrow' : pygame.mixer.Sound('sfx/grub_burrow.wav'),
-            'grub_alert' : pygame.mixer.Sound('sfx/grub_alert.wav'),
-            'grub_sad_1' : pygame.mixer.Sound('sfx/grub_sad_1.wav'),
-            'grub_sad_idle_1' : pygame.mixer.Sound('sfx/grub_sad_idle_1.wav'),
-            'grub_sad_idle_2' : pygame.mixer.Sound('sfx/grub_sad_idle_2.wav'),
-            'grubfather_1' : pygame.mixer.Sound('sfx/grubfather_1.wav'),
-            'ability_pickup' : pygame.mixer.Sound('sfx/ability_pickup_boom.wav'),
-            'ability_info' : pygame.mixer.Sound('sfx/ability_info.wav'),
-            'dark_spell_get' : pygame.mixer.Sound('sfx/dark_spell_get.wav'),
-            'shiny_item' : pygame.mixer.Sound('sfx/shiny_item.wav'),
-            'saw_loop' : pygame.mixer.Sound('sfx/saw_loop.wav'),
-            'gate' : pygame.mixer.Sound('sfx/gate.wav'),
-            'lever' : pygame.mixer.Sound('sfx/lever.wav'),
-            'shade_gate' : pygame.mixer.Sound('sfx/shade_gate.wav'),
-            'shade_gate_repel' : pygame.mixer.Sound('sfx/shade_gate_repel.wav'),
-            'crawler' : pygame.mixer.Sound('sfx/crawler.wav'),
-            'wall_creeper' : pygame.mixer.Sound('sfx/wall_creeper.wav'),
-        }
-
-        # Initialize audio volume
-        self.sfx['run_grass'].set_volume(0.2)
-        self.sfx['run_stone'].set_volume(0.2)
-        self.sfx['jump'].set_volume(0.10)
-        self.sfx['land'].set_volume(0.06)
-        self.sfx['land_hard'].set_volume(0.10)
-        self.sfx['falling'].set_volume(0.2)
-        self.sfx['wings'].set_volume(0.2)
-        self.sfx['dash'].set_volume(0.14)
-        self.sfx['cloak'].set_volume(0.08)
-        self.sfx['hitstun'].set_volume(0.2)
-        self.sfx['wall_jump'].set_volume(0.12 )
-        self.sfx['wall_slide'].set_volume(0.12)
-        self.sfx['mantis_claw'].set_volume(0.15)
-        self.sfx['grub_free_1'].set_volume(0.2)
-        self.sfx['grub_free_2'].set_volume(0.2)
-        self.sfx['grub_free_3'].set_volume(0.3)
-        self.sfx['grub_break'].set_volume(0.15)
-        self.sfx['grub_burrow'].set_volume(0.35)
-        self.sfx['grub_alert'].set_volume(0.3)
-        self.sfx['grub_sad_1'].set_volume(0.1)
-        self.sfx['grub_sad_idle_1'].set_volume(0.2)
-        self.sfx['grub_sad_idle_2'].set_volume(0.2)
-        self.sfx['grubfather_1'].set_volume(0.015)
-        self.sfx['ability_pickup'].set_volume(0.35)
-        self.sfx['ability_info'].set_volume(0.2)
-        self.sfx['dark_spell_get'].set_volume(0.6)
-        self.sfx['shiny_item'].set_volume(0.0)
-        self.sfx['saw_loop'].set_volume(0.0)
-        self.sfx['gate'].set_volume(0.15)
-        self.sfx['lever'].set_volume(0.15)
-        self.sfx['shade_gate'].set_volume(0.35)
-        self.sfx['shade_gate_repel'].set_volume(0.3)
-        self.sfx['crawler'].set_volume(0.05)
-        self.sfx['wall_creeper'].set_volume(0.05)
+        self.music_volume_step = None                               # Mixer volume step last applied to the music, avoids redundant set_volume calls
+        self.sfx = {}
+        for name, path, volume in SFX_SPECS:
+            self.sfx[name] = LazySound(path)
+            self.sfx[name].set_volume(volume)
+        for name in PRELOADED_SFX:
+            self.sfx[name].load()
+
+        # Randomly picked grub sounds, indexed by random number - 1 instead of building the sfx name every time
+        self.sfx_grub_sad = [self.sfx['grub_sad_idle_1'], self.sfx['grub_sad_idle_2']]
+        self.sfx_grub_free = [self.sfx['grub_free_1'], self.sfx['grub_free_2'], self.sfx['grub_free_3']]
 
         
 
         # Player Init
         self.player_spawn_pos = PLAYER_START_POS
         self.player = Player(self, PLAYER_START_POS, PLAYER_SIZE)
-        self.player_movement = [False, False]
+        self.stick_dir = 0                                          # Controller stick direction (-1 left, 0 center, 1 right), keyboard movement is polled each frame
+
+        # Keyboard dispatch tables, one dict lookup per key event instead of a chain of compares
+        self.keydown_actions = {
+            pygame.K_w : self.press_up,                     # W is up
+            pygame.K_UP : self.press_up,
+            pygame.K_s : self.press_down,                   # S is down
+            pygame.K_DOWN : self.press_down,
+            pygame.K_SPACE : self.player.jump,              # SPACE is jump
+            pygame.K_LSHIFT : self.player.dash,             # SHIFT is dash
+            pygame.K_RSHIFT : self.player.dash,
+            pygame.K_f : self.use_grub_finder,              # F is ping nearest grub
+            pygame.K_v : self.dev_unlock_all,               # V is ALL dev unlock
+            pygame.K_7 : self.dev_unlock_dash,              # 7 is unlock dash
+            pygame.K_8 : self.dev_unlock_claw,              # 8 is unlock claw
+            pygame.K_9 : self.dev_unlock_wings,             # 9 is unlock wings
+            pygame.K_0 : self.dev_unlock_cloak,             # 0 is unlock cloak
+            pygame.K_BACKSPACE : self.antisoftlock,         # Backspace is antisoftlock
+        }
+        self.keyup_actions = {
+            pygame.K_w : self.release_up,
+            pygame.K_UP : self.release_up,
+            pygame.K_s : self.release_down,
+            pygame.K_DOWN : self.release_down,
+            pygame.K_SPACE : self.player.jump_release,      # Jump release for variable jump height
+        }
+
+        # Controller dispatch tables built from the button groups
+        self.joybuttondown_actions = {}
+        self.joybuttondown_actions.update(dict.fromkeys(JUMP_BUTTONS, self.player.jump))             # A or B is JUMP
+        self.joybuttondown_actions.update(dict.fromkeys(DASH_BUTTONS, self.player.dash))             # X or Y or RB is DASH
+        self.joybuttondown_actions.update(dict.fromkeys(GRUB_FINDER_BUTTONS, self.use_grub_finder))  # All DPAD or LB is Grub finder
+        self.joybuttonup_actions = dict.fromkeys(JUMP_BUTTONS, self.player.jump_release)
         
         # World Init
         self.tilemap = Tilemap(self, tile_size=16)
@@ -218,50 +276,34 @@ class Game:
 
         # Particle Init
         self.particles = []
+        self.particle_pool = []                                     # Dead particles kept for reuse by spawn_particle
 
         # Entity Init
         self.grubs_collected = 0
         self.collectables = []
-        for spawner in self.tilemap.extract([('spawners', 0), ('spawners', 1), ('spawners', 2), ('spawners', 3), ('spawners', 4), ('spawners', 5), ('spawners', 6), ('spawners', 7), ('spawners', 8), ('spawners', 9), ('spawners', 10) , ('spawners', 11)]):
-            if spawner['variant'] == 0:
-                self.collectables.append(Collectable(self, spawner['pos'], 'respawn'))
-            if spawner['variant'] == 1:
-                self.collectables.append(Collectable(self, spawner['pos'], 'grub'))
-            if spawner['variant'] == 2:
+        spawner_ids = [('spawners', PLAYER_SPAWNER)] + [('spawners', variant) for variant in COLLECTABLE_SPAWNERS]
+        for spawner in self.tilemap.extract(spawner_ids):
+            if spawner['variant'] == PLAYER_SPAWNER:
                 self.player.pos = spawner['pos'].copy()
                 self.world_spawn_pos = spawner['pos'].copy()
                 self.player_spawn_pos = spawner['pos'].copy()
-            if spawner['variant'] == 3:
-                self.collectables.append(Collectable(self, spawner['pos'], 'cloak_pickup'))
-            if spawner['variant'] == 4:
-                self.collectables.append(Collectable(self, spawner['pos'], 'claw_pickup'))
-            if spawner['variant'] == 5:
-                self.collectables.append(Collectable(self, spawner['pos'], 'wings_pickup'))
-            if spawner['variant'] == 6:
-                self.collectables.append(Collectable(self, spawner['pos'], 'saw'))
-            if spawner['variant'] == 7:
-                self.collectables.append(Collectable(self, spawner['pos'], 'gate', x_collisions=True))
-            if spawner['variant'] == 8:
-                self.collectables.append(Collectable(self, spawner['pos'], 'lever'))
-            if spawner['variant'] == 9:
-                self.collectables.append(Collectable(self, spawner['pos'], 'dash_pickup'))
-            if spawner['variant'] == 10:
-                self.collectables.append(Collectable(self, spawner['pos'], 'shade_gate', x_collisions=True))
-            if spawner['variant'] == 11:
-                self.collectables.append(Collectable(self, spawner['pos'], 'slippery_rock', x_collisions=True))
+            else:
+                c_type, x_collisions = COLLECTABLE_SPAWNERS[spawner['variant']]
+                self.collectables.append(Collectable(self, spawner['pos'], c_type, x_collisions=x_collisions))
 
         # Enemy Init
         self.enemies = []
-        for enemy in self.tilemap.extract([('enemies', 0), ('enemies', 1), ('enemies', 2), ('enemies', 3)]):
-            if enemy['variant'] == 0:
-                self.enemies.append(Enemy(self, 'crawlid', enemy['pos'], (21, 15)))
-            if enemy['variant'] == 1:
-                self.enemies.append(Enemy(self, 'wall_creeper', enemy['pos'], (12, 20), gravity=0, vert_flip=True))
+        for enemy in self.tilemap.extract([('enemies', variant) for variant in ENEMY_SPAWNERS]):
+            e_type, size, kwargs = ENEMY_SPAWNERS[enemy['variant']]
+            self.enemies.append(Enemy(self, e_type, enemy['pos'], size, **kwargs))
 
         # Hud Init
         self.hud = []
         self.score_text = pygame.font.Font('freesansbold.ttf', 30)
         self.score_text_back = pygame.font.Font('freesansbold.ttf', 31)
+        self.score_shown = None                                     # Score the cached text images were rendered for
+        self.score_img = None
+        self.score_img_back = None
 
         self.hud.append(HudElement(self, self.assets['guide_move'], (8, 0)))
         self.hud.append(HudElement(self, self.assets['guide_jump'], (64, 0)))
@@ -272,204 +314,232 @@ class Game:
         self.playing_timer = 0
         
 
+
+    def spawn_particle(self, p_type, pos, velocity=(0,0), frame=0, flip=False, follow_player=False, scale=1.0, opacity=255, fade_out=0):
+        """
+        Add a particle to the world, reusing a dead one from the pool when available
+        """
+        if self.particle_pool:
+            particle = self.particle_pool.pop()
+            particle.reset(p_type, pos, velocity, frame, flip, follow_player, scale, opacity, fade_out)
+        else:
+            particle = Particle(self, p_type, pos, velocity, frame, flip, follow_player, scale, opacity, fade_out)
+        self.particles.append(particle)
+        return particle
+
+
+    def play_music(self):
+        """
+        Load and loop a random music track
+        """
+        music_num = random.randint(0, 4)
+        pygame.mixer.music.load('sfx/music_' + str(music_num) + '.wav')
+        self.set_music_volume(self.music_volume)
+        pygame.mixer.music.play(-1)
+
+    def set_music_volume(self, volume):
+        """
+        Set the music volume, skipping the mixer call when it lands on the same 1/128 SDL_mixer step as before
+        """
+        volume_step = int(volume * MIXER_MAX_VOLUME)
+        if volume_step != self.music_volume_step:
+            pygame.mixer.music.set_volume(volume)
+            self.music_volume_step = volume_step
+
+
+    # Input handlers called through the keyboard dispatch tables
+    def press_up(self):
+        self.player.holding_up = True
+
+    def release_up(self):
+        self.player.holding_up = False
+
+    def press_down(self):
+        self.player.holding_down = True
+
+    def release_down(self):
+        self.player.holding_down = False
+
+    def use_grub_finder(self):
+        """
+        Ping nearest grub once the grub finder is unlocked
+        """
+        if self.player.has_grub_finder:
+            self.player.grub_pointer()
+
+    def dev_unlock_all(self):
+        self.player.has_dash = True
+        self.player.has_claw = True
+        self.player.has_wings = True
+        self.player.has_cloak = True
+        self.player.has_grub_finder = True
+        self.sfx['grubfather_1'].play()
+
+    def dev_unlock_dash(self):
+        self.player.has_dash = True
+
+    def dev_unlock_claw(self):
+        self.player.has_claw = True
+
+    def dev_unlock_wings(self):
+        self.player.has_wings = True
+
+    def dev_unlock_cloak(self):
+        self.player.has_cloak = True
+
+    def antisoftlock(self):
+        """
+        Send player back to the world spawn through a death warp
+        """
+        self.player_spawn_pos = self.world_spawn_pos.copy()
+        self.damage_fade_out = True
+
    
     def run(self):
         """
         Primary game loop; controls rendering, game initialization, and player input
         """
 
+        # Bind per-frame invariants once instead of re-resolving them every frame
+        display = self.display
+        screen = self.screen
+        player = self.player
+        event_get = pygame.event.get
+        half_display_w = DISPLAY_SIZE[0] / 2
+        half_display_h = DISPLAY_SIZE[1] / 2
+        depths_img = self.assets['void_background']
+        background_img = self.assets['background']
+
+        # Start looping music playback, restarted through MUSIC_END_EVENT if the track ever stops
+        self.play_music()
+
          # Runs ~60 times per second
         while True:
 
-            # Start looping music playback
-            if not pygame.mixer.music.get_busy():
-                music_num = random.randint(0, 4)
-                pygame.mixer.music.load('sfx/music_' + str(music_num) + '.wav')
-                pygame.mixer.music.set_volume(self.music_volume)
-                pygame.mixer.music.play(-1)
-
             # Input event loop
-            for event in pygame.event.get():
+            for event in event_get():
+
+                # Music track stopped, start a new one
+                if event.type == MUSIC_END_EVENT:
+                    self.play_music()
 
                 # Exit the application
                 if event.type == pygame.QUIT:
                     print('Grub Count: ' + str(self.grubs_collected) + ' / ' + str(Collectable.total_grubs) + ' grubs')
-                    print('Death Count: ' + str(self.player.death_counter) + ' deaths')
+                    print('Death Count: ' + str(player.death_counter) + ' deaths')
                     print('Playing Time: ' + str(self.playing_timer // TICK_RATE // TICK_RATE) + ' minutes and ' + str(self.playing_timer // TICK_RATE % TICK_RATE) + ' seconds')
                     pygame.quit()
                     sys.exit()
 
                 # Keystroke down
                 if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_a or event.key == pygame.K_LEFT:           # A is left
-                        self.player_movement[0] = True
-                        self.player.holding_left = True
-                    if event.key == pygame.K_d or event.key == pygame.K_RIGHT:          # D is right
-                        self.player_movement[1] = True
-                        self.player.holding_right = True
-                    if event.key == pygame.K_w or event.key == pygame.K_UP:             # W is up
-                        self.player.holding_up = True
-                    if event.key == pygame.K_s or event.key == pygame.K_DOWN:           # S is down
-                        self.player.holding_down = True
-                    if event.key == pygame.K_SPACE:                                     # SPACE is jump
-                        self.player.jump()
-                    if event.key == pygame.K_LSHIFT or event.key == pygame.K_RSHIFT:    # SHIFT is dash
-                        self.player.dash()
-                    if event.key == pygame.K_f and self.player.has_grub_finder:         # F is ping nearest grub
-                        self.player.grub_pointer()
-                    if event.key == pygame.K_v:                                         # V is ALL dev unlock
-                        self.player.has_dash = True
-                        self.player.has_claw = True
-                        self.player.has_wings = True
-                        self.player.has_cloak = True
-                        self.player.has_grub_finder = True
-                        self.sfx['grubfather_1'].play()
-                    if event.key == pygame.K_7:                                         # 7 is unlock dash
-                        self.player.has_dash = True
-                    if event.key == pygame.K_8:                                         # 8 is unlock claw
-                        self.player.has_claw = True
-                    if event.key == pygame.K_9:                                         # 9 is unlock wings
-                        self.player.has_wings = True
-                    if event.key == pygame.K_0:                                         # 0 is unlock cloak
-                        self.player.has_cloak = True
-                    if event.key == pygame.K_BACKSPACE:                                 # Backspace is antisoftlock
-                        self.player_spawn_pos = self.world_spawn_pos.copy()
-                        self.damage_fade_out = True
+                    action = self.keydown_actions.get(event.key)
+                    if action:
+                        action()
 
                 # Keystroke up
                 if event.type == pygame.KEYUP:
-                    if event.key == pygame.K_a or event.key == pygame.K_LEFT:
-                        self.player_movement[0] = False
-                        self.player.holding_left = False 
-                    if event.key == pygame.K_d or event.key == pygame.K_RIGHT:
-                        self.player_movement[1] = False
-                        self.player.holding_right = False
-                    if event.key == pygame.K_w or event.key == pygame.K_UP:         
-                        self.player.holding_up = False
-                    if event.key == pygame.K_s or event.key == pygame.K_DOWN:         
-                        self.player.holding_down = False
-                    if event.key == pygame.K_SPACE:
-                        self.player.jump_release()                                      # Jump release for variable jump height
+                    action = self.keyup_actions.get(event.key)
+                    if action:
+                        action()
 
                 # Controller button down
                 if event.type == pygame.JOYBUTTONDOWN:
-                    if event.button == 0 or event.button == 1:                                              # A or B is JUMP
-                        self.player.jump()
-                    if event.button == 2 or event.button == 3 or event.button == 10:   # X or Y or RB is DASH
-                        self.player.dash()
-                    if event.button == 11 or event.button == 12 or event.button == 13 or event.button == 14 or event.button == 9: # All DPAD or LB is Grub finder
-                        if self.player.has_grub_finder:
-                            self.player.grub_pointer()
+                    action = self.joybuttondown_actions.get(event.button)
+                    if action:
+                        action()
 
 
                 # Controller button up
                 if event.type == pygame.JOYBUTTONUP:
-                    if event.button == 0 or event.button == 1:                                        
-                        self.player.jump_release() 
+                    action = self.joybuttonup_actions.get(event.button)
+                    if action:
+                        action()
 
                 # Controller axis motion
                 if event.type == pygame.JOYAXISMOTION:
                     if event.axis == 0:                                     # Horizontal joystick movement on only left joystick
-                        if event.value < -0.65:                              # Left joystick movement
-                            self.player_movement[0] = True
-                            self.player.holding_left = True
-                            self.player_movement[1] = False
-                            self.player.holding_right = False
-                        if event.value > 0.65:                               # Right joystick movement
-                            self.player_movement[0] = False
-                            self.player.holding_left = False
-                            self.player_movement[1] = True
-                            self.player.holding_right = True
-                        if event.value > -0.65 and event.value < 0.65:        # Reset movement in the middle
-                            self.player_movement[0] = False
-                            self.player.holding_left = False
-                            self.player_movement[1] = False
-                            self.player.holding_right = False
-
-                    if event.axis == 3:                                     # Vertical joystick detection on right joystick       
-                        if event.value < -0.5:                              # Up joystick movement
-                            self.player.holding_down = False
-                            self.player.holding_up = True
-                        if event.value > 0.5:                               # Down joystick movement
-                            self.player.holding_down = True
-                            self.player.holding_up = False
-                        if event.value > -0.5 and event.value < 0.5:        # Reset in the middle
-                            self.player.holding_down = False
-                            self.player.holding_up = False
+                        self.stick_dir = (event.value > 0.65) - (event.value < -0.65)      # -1 left, 1 right, 0 in the middle
+
+                    if event.axis == 3:                                     # Vertical joystick detection on right joystick
+                        player.holding_up = event.value < -0.5
+                        player.holding_down = event.value > 0.5
 
                     if event.axis == 4 or event.axis == 5:                  # Both triggers dash detection
                         if event.value > -0.5 and not self.holding_trigger:
-                            self.player.dash()
+                            player.dash()
                             self.holding_trigger = True
                         if event.value < -0.5:
                             self.holding_trigger = False
 
-            # Fix movement not being updated 
-            if not self.player_movement[0] and self.player.holding_left:
-                self.player_movement[0] = True
-            if not self.player_movement[1] and self.player.holding_right:
-                self.player_movement[1] = True
+            # Poll held movement keys once per frame (A, D or Left, Right), merged with the controller stick
+            # Reading SDL's key state directly also releases keys held while the window lost focus
+            keys = pygame.key.get_pressed()
+            player.holding_left = keys[pygame.K_a] or keys[pygame.K_LEFT] or self.stick_dir < 0
+            player.holding_right = keys[pygame.K_d] or keys[pygame.K_RIGHT] or self.stick_dir > 0
+            move_dir = player.holding_right - player.holding_left
 
 
 
-            # Adjust camera scroll and increase camera smoothness based on if player is looking vertically
+            # Adjust camera look offset and increase camera smoothness based on if player is looking vertically
             self.camera_smooth = CAMERA_SMOOTH
-            if self.player.looking_up and self.player.idle_timer > LOOK_THRESHOLD:
-                self.scroll = [self.scroll[0], self.scroll[1] - LOOK_OFFSET]
+            look_shift = 0
+            if player.looking_up and player.idle_timer > LOOK_THRESHOLD:
+                look_shift -= LOOK_OFFSET
                 self.camera_smooth = CAMERA_SMOOTH * 1.75
-            if self.player.looking_down and self.player.idle_timer > LOOK_THRESHOLD:
-                self.scroll = [self.scroll[0], self.scroll[1] + LOOK_OFFSET]
+            if player.looking_down and player.idle_timer > LOOK_THRESHOLD:
+                look_shift += LOOK_OFFSET
                 self.camera_smooth = CAMERA_SMOOTH * 1.75
 
 
             # Draw blank black background
-            self.display.fill((0, 0, 0))
+            display.fill((0, 0, 0))
 
             # Determine depths background opacity ( messy AF )
-            if self.player.pos[0] < DEPTHS_X:
-                if self.player.has_cloak:
-                    self.depths_background_alpha = min(80, 0 + (self.player.pos[1] - DEPTHS_Y) * 0.15)
+            if player.pos[0] < DEPTHS_X:
+                if player.has_cloak:
+                    self.depths_background_alpha = min(80, 0 + (player.pos[1] - DEPTHS_Y) * 0.15)
                 else:
                     self.depths_background_alpha = 0
 
                 # If in depths in both X and Y,
-                if self.player.pos[1] > DEPTHS_Y:
+                if player.pos[1] > DEPTHS_Y:
 
                     # Mute music based on depth
-                    pygame.mixer.music.set_volume(max(0, DEFAULT_MUSIC_VOLUME - (self.player.pos[1] - DEPTHS_Y) * 0.005))
+                    self.set_music_volume(max(0, DEFAULT_MUSIC_VOLUME - (player.pos[1] - DEPTHS_Y) * 0.005))
 
                     # Spawn floating void particles
-                    if random.randint(0, abs(15 - int(self.player.pos[1] // 100))) == 0 and self.player.pos[1] > DEPTHS_Y + 40:
-                        self.particles.append(Particle(self, 'long_cloak_particle', (self.player.pos[0] + random.randint(-250, 250), self.player.pos[1] + random.randint(-200, 200)), velocity=(random.uniform(-0.2, 0.2), random.uniform(-0.2, 0.2))))
+                    if random.randint(0, abs(15 - int(player.pos[1] // 100))) == 0 and player.pos[1] > DEPTHS_Y + 40:
+                        self.spawn_particle('long_cloak_particle', (player.pos[0] + random.randint(-250, 250), player.pos[1] + random.randint(-200, 200)), velocity=(random.uniform(-0.2, 0.2), random.uniform(-0.2, 0.2)))
                 else:
-                    pygame.mixer.music.set_volume(DEFAULT_MUSIC_VOLUME)
+                    self.set_music_volume(DEFAULT_MUSIC_VOLUME)
             else:
                 self.depths_background_alpha = 0
 
-            # Draw depths background
-            depths_img = self.assets['void_background']
-            depths_img.set_alpha(self.depths_background_alpha)
-            self.display.blit(depths_img, (0, 0))
+            # Draw depths background, skipped while fully transparent (set_alpha truncates below 1 to 0)
+            if self.depths_background_alpha >= 1:
+                depths_img.set_alpha(self.depths_background_alpha)
+                display.blit(depths_img, (0, 0))
 
             # Determine normal background opacity
-            if self.player.pos[1] > DEPTHS_Y:
-                self.background_alpha = max(0, 230 - (self.player.pos[1] - DEPTHS_Y) * 1.5)
+            if player.pos[1] > DEPTHS_Y:
+                self.background_alpha = max(0, 230 - (player.pos[1] - DEPTHS_Y) * 1.5)
             else:
                 self.background_alpha = 230
                 self.darken_alpha = 0
 
             # Determine darkening foreground opacity
-            if self.player.pos[1] > DEPTHS_Y and not self.player.has_cloak:
-                self.darken_alpha = min(120, 0 + (self.player.pos[1] - DEPTHS_Y) * 0.2)
-            elif self.player.pos[1] > DEPTHS_Y and self.player.has_cloak:
-                self.darken_alpha = min(110, 0 + (self.player.pos[1] - DEPTHS_Y) * 0.18)
+            if player.pos[1] > DEPTHS_Y and not player.has_cloak:
+                self.darken_alpha = min(120, 0 + (player.pos[1] - DEPTHS_Y) * 0.2)
+            elif player.pos[1] > DEPTHS_Y and player.has_cloak:
+                self.darken_alpha = min(110, 0 + (player.pos[1] - DEPTHS_Y) * 0.18)
             else:
                 self.darken_alpha = 0
             
-            # Draw normal background
-            background_img = self.assets['background']
-            background_img.set_alpha(self.background_alpha)
-            self.display.blit(self.assets['background'], (0,0))
+            # Draw normal background, skipped while fully transparent deep in the depths
+            if self.background_alpha >= 1:
+                background_img.set_alpha(self.background_alpha)
+                display.blit(background_img, (0,0))
 
 
             # Freeze player when fading in or out from death warp
@@ -478,7 +548,7 @@ class Game:
 
                 # First frame of fade out
                 if self.blackout_alpha > 0 and self.blackout_alpha <= FADE_SPEED :
-                    self.player.hitstun_animation()
+                    player.hitstun_animation()
 
                 # Fading out
                 if self.blackout_alpha < 255:
@@ -487,7 +557,7 @@ class Game:
                 # Black screen
                 else:
                     self.camera_smooth = 1
-                    self.player.death_warp()
+                    player.death_warp()
                     self.damage_fade_out = False
                     self.damage_fade_in = True
 
@@ -495,23 +565,23 @@ class Game:
 
                 # First frame of fade in
                 if self.blackout_alpha == 255:
-                    self.player.intangibility_timer = 60
+                    player.intangibility_timer = 60
 
                 # Last few frames of fade in
                 if self.blackout_alpha < 70:
-                    self.player.set_action('idle') 
+                    player.set_action('idle') 
 
                 # Fading in
                 if self.blackout_alpha > 0:
                     self.blackout_alpha = max(0, self.blackout_alpha - FADE_SPEED * 1.5)
-                    self.player.velocity = [0, 0]
+                    player.velocity = [0, 0]
 
                 # Full opacity
                 else:
                     self.camera_smooth = CAMERA_SMOOTH
-                    self.player.can_move = True
-                    self.player.air_time = -2
-                    self.player.set_action('idle')
+                    player.can_move = True
+                    player.air_time = -2
+                    player.set_action('idle')
                     self.damage_fade_in = False
 
             # Fade into first scene
@@ -520,83 +590,123 @@ class Game:
                 self.camera_smooth = 1
             if self.playing_timer < 25:
                 self.blackout_alpha -= 10
-                self.player.can_move = True
+                player.can_move = True
             
 
-            # Control Camera
-            self.scroll[0] += (self.player.entity_rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / self.camera_smooth
-            self.scroll[1] += (self.player.entity_rect().centery - self.display.get_height() / 2 - self.scroll[1]) / self.camera_smooth
+            # Control Camera, easing toward the player in local floats and writing scroll back once
+            player_rect = player.entity_rect()
+            scroll_x, scroll_y = self.scroll
+            scroll_y += look_shift
+            scroll_x += (player_rect.centerx - half_display_w - scroll_x) / self.camera_smooth
+            scroll_y += (player_rect.centery - half_display_h - scroll_y) / self.camera_smooth
+            self.scroll[0] = scroll_x
+            self.scroll[1] = scroll_y
 
-            render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
+            render_scroll = (int(scroll_x), int(scroll_y))
 
             # Render tilemap
-            self.tilemap.render(self.display, offset=render_scroll)
+            self.tilemap.render(display, offset=render_scroll)
 
 
             # Update player movement and animation
-            if self.player.can_update and self.player.can_move:
-                self.player.update(self.tilemap, (self.player_movement[1] - self.player_movement[0], 0))
-            if self.player.can_update and not self.player.can_move:
-                self.player.update(self.tilemap, (0, 0))
-
-            # Update and render enemies
-            for enemy in self.enemies.copy():
-                enemy.update()
-                enemy.render(self.display, offset=render_scroll)
-
-            # Update and render collectables
+            if player.can_update:
+                player.update(self.tilemap, (move_dir, 0) if player.can_move else (0, 0))
+
+            # Update and render enemies, rebuilding the list with only the enemies still alive
+            # Enemies outside the camera view are culled before building their flipped and scaled image
+            alive_enemies = []
+            enemy_blits = []
+            for enemy in self.enemies:
+                kill = enemy.update()
+                if enemy.in_view(render_scroll, DISPLAY_SIZE):
+                    enemy_blits.append(enemy.get_blit(render_scroll))
+                if not kill:
+                    alive_enemies.append(enemy)
+            self.enemies = alive_enemies
+            display.fblits(enemy_blits)
+
+            # Update collectables, iterating a copy since pickups remove themselves when collected
+            # Only collectables near the player run the full distance and collision update, the rest just tick
+            player_center = player.entity_rect().center
+            player_cell = (player_center[0] // NEAR_CELL_SIZE, player_center[1] // NEAR_CELL_SIZE)
             for collectable in self.collectables.copy():
-                collectable.update()
-                collectable.render(self.display, offset=render_scroll)
+                if collectable.is_near(player_cell):
+                    collectable.update()
+                else:
+                    collectable.update_far()
+            # Render every visible collectable in a single batch
+            display.fblits([collectable.get_blit(render_scroll) for collectable in self.collectables if collectable.in_view(render_scroll, DISPLAY_SIZE)])
 
 
-            # Render gradual depths fade
-            self.darken_surf.set_alpha(self.darken_alpha)
-            self.display.blit(self.darken_surf)
+            # Render gradual depths fade, skipped entirely while fully transparent
+            if self.darken_alpha >= 1:
+                if self.darken_alpha != self.darken_surf_alpha:
+                    self.darken_surf.set_alpha(self.darken_alpha)
+                    self.darken_surf_alpha = self.darken_alpha
+                display.blit(self.darken_surf)
             
             # Render player
-            self.player.render(self.display, offset=render_scroll)
+            player.render(display, offset=render_scroll)
             
 
-            # Update and render particles
-            for particle in self.particles.copy():
+            # Update and render particles, rebuilding the list with only the particles still alive
+            alive_particles = []
+            particle_blits = []
+            for particle in self.particles:
                 kill = particle.update()
-                particle.render(self.display, offset=(render_scroll))
-                if kill:
-                    self.particles.remove(particle)
+                particle_blit = particle.get_blit(render_scroll, DISPLAY_SIZE)
+                if particle_blit:
+                    particle_blits.append(particle_blit)
+                if not kill:
+                    alive_particles.append(particle)
+                else:
+                    self.particle_pool.append(particle)
+            self.particles = alive_particles
+            display.fblits(particle_blits)
             
 
-            # Update and render hud elements
-            for hud in self.hud.copy():
-                hud.update()
-                hud.render(self.display)
+            # Update and render hud elements in a single batch, rebuilding the list with only the elements still shown
+            alive_hud = []
+            hud_blits = []
+            for hud in self.hud:
+                kill = hud.update()
+                hud_blits.append(hud.get_blit())
+                if not kill:
+                    alive_hud.append(hud)
+            self.hud = alive_hud
+            display.fblits(hud_blits)
             # Display look guide after first guide fades
             if self.playing_timer == 400:
                 self.hud.append(HudElement(self, self.assets['guide_look'] ,(8, 10)))
             # Display grub finder guide after reaching a threshold of grubs collected
-            if self.grubs_collected >= Collectable.total_grubs / 3 and not self.player.has_grub_finder:
-                self.player.has_grub_finder = True
+            if self.grubs_collected >= Collectable.total_grubs / 3 and not player.has_grub_finder:
+                player.has_grub_finder = True
                 self.hud.append(HudElement(self, self.assets['guide_grub'] ,(0, 6)))
 
 
-            # Render display onto final screen (upscaling)
-            self.screen.fill((1, 1, 1))
-            self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()))
+            # Render display onto final screen (upscaling straight into the screen surface, no per-frame allocation)
+            pygame.transform.scale(display, SCREEN_SIZE, screen)
 
-            # Render layered text onto screen to accomodate anti aliasing
-            score_img_back = self.score_text_back.render(str(self.grubs_collected) + '/' + str(Collectable.total_grubs), False, (0, 60, 20))
-            score_img = self.score_text.render(str(self.grubs_collected) + '/' + str(Collectable.total_grubs), False, (30, 120, 80))
-            self.screen.blit(score_img_back, (SCREEN_SIZE[0] - score_img.get_width() - 55, 13))
-            self.screen.blit(score_img, (SCREEN_SIZE[0] - score_img.get_width() - 56.5, 12))
+            # Render layered text onto screen to accomodate anti aliasing, re-rendering the text only when the score changes
+            score = (self.grubs_collected, Collectable.total_grubs)
+            if score != self.score_shown:
+                self.score_img_back = self.score_text_back.render(str(self.grubs_collected) + '/' + str(Collectable.total_grubs), False, (0, 60, 20))
+                self.score_img = self.score_text.render(str(self.grubs_collected) + '/' + str(Collectable.total_grubs), False, (30, 120, 80))
+                self.score_shown = score
+            screen.blit(self.score_img_back, (SCREEN_SIZE[0] - self.score_img.get_width() - 55, 13))
+            screen.blit(self.score_img, (SCREEN_SIZE[0] - self.score_img.get_width() - 56.5, 12))
 
 
-            # Render and update blackout surface onto screen
-            self.blackout_surf.set_alpha(self.blackout_alpha)
-            self.screen.blit(self.blackout_surf)
+            # Render and update blackout surface onto screen, skipped entirely while fully transparent
+            if self.blackout_alpha > 0:
+                if self.blackout_alpha != self.blackout_surf_alpha:
+                    self.blackout_surf.set_alpha(self.blackout_alpha)
+                    self.blackout_surf_alpha = self.blackout_alpha
+                screen.blit(self.blackout_surf)
 
 
             # End frame
-            pygame.display.update()
+            pygame.display.flip()
             self.playing_timer += 1
             self.clock.tick(TICK_RATE)
 
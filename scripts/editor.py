@@ -12,6 +12,16 @@ TICK_RATE = 60
 CAMERA_SPEED = 2
 PLACING_OPACITY = 200
 RENDER_SCALE = 4.0
+OFFGRID_CELL_SIZE = 64          # Spatial index cell for offgrid tiles, larger than any tile image
+
+# Events the editor never reads, mouse position is polled each frame instead of tracked through MOUSEMOTION
+BLOCKED_EVENTS = [pygame.MOUSEMOTION, pygame.MOUSEWHEEL, pygame.TEXTINPUT, pygame.TEXTEDITING]
+
+def offgrid_cell(pos):
+    """
+    Spatial index cell containing a world position
+    """
+    return (int(pos[0] // OFFGRID_CELL_SIZE), int(pos[1] // OFFGRID_CELL_SIZE))
 
 class Editor:
     """
@@ -26,9 +36,10 @@ class Editor:
         # full size screen used for window
         self.screen = pygame.display.set_mode(SCREEN_SIZE, flags=pygame.SCALED, vsync=1)
         pygame.display.set_caption("PixelKnight - LEVEL EDITOR")
+        pygame.event.set_blocked(BLOCKED_EVENTS)
 
         # 1/2 scale display used for rendering, scale up to screen
-        self.display = pygame.Surface(DISPLAY_SIZE)
+        self.display = pygame.Surface(DISPLAY_SIZE).convert()
 
         # Load assets
         self.assets = {
@@ -41,17 +52,20 @@ class Editor:
             'enemies' : load_images('tiles/enemies'),
         }
 
+        # Translucent copies of every asset for the placing preview, built once instead of copied every frame
+        self.preview_assets = {}
+        for tile_type, images in self.assets.items():
+            self.preview_assets[tile_type] = [img.copy() for img in images]
+            for img in self.preview_assets[tile_type]:
+                img.set_alpha(PLACING_OPACITY)
+
         # World Init
         self.tilemap = Tilemap(self, tile_size=16)
         self.level_select = 0
-        try:
-            self.tilemap.load('maps/' + str(self.level_select) + '.json')
-        except FileNotFoundError:
-            pass
+        self.load_map()
 
         # Camera Init
         self.scroll = [0, 0]
-        self.movement = [False, False, False, False]
         self.pos_text = pygame.font.Font('freesansbold.ttf', 30)
 
         # Tile Creation Init
@@ -66,6 +80,55 @@ class Editor:
         self.clicking = False
         self.right_clicking = False
         self.shifting = False
+        self.last_mpos = None                   # Mouse position of the last drawn frame, idle frames are skipped
+
+        # Keyboard dispatch table, one dict lookup per key event instead of a chain of compares
+        self.keydown_actions = {
+            pygame.K_g : self.toggle_ongrid,                # G is toggle ongrid
+            pygame.K_t : self.tilemap.autotile,             # T is autotile
+            pygame.K_RETURN : self.save_map,                # RETURN (ENTER) is save file
+            pygame.K_l : self.load_map,                     # L is load file
+            pygame.K_LSHIFT : self.start_shifting,          # SHIFT is alternate scroll (category)
+        }
+    
+
+    def load_map(self):
+        """
+        Load the selected map file if it exists and index its offgrid tiles
+        """
+        try:
+            self.tilemap.load('maps/' + str(self.level_select) + '.json')
+        except FileNotFoundError:
+            pass
+        self.index_offgrid()
+
+    def save_map(self):
+        """
+        Save the selected map file
+        """
+        self.tilemap.save('maps/' + str(self.level_select) + '.json')
+        print('FILE SAVED to map ' + str(self.level_select) + ' on ' + datetime.datetime.now().strftime('%m/%d/%y at %I:%M:%S %p'))
+
+    def toggle_ongrid(self):
+        self.ongrid = not self.ongrid
+
+    def start_shifting(self):
+        self.shifting = True
+
+    def index_offgrid(self):
+        """
+        Rebuild the spatial index of offgrid tiles, bucketed by the OFFGRID_CELL_SIZE cell containing their position
+        """
+        self.offgrid_index = {}
+        for tile in self.tilemap.offgrid_tiles:
+            self.offgrid_index.setdefault(offgrid_cell(tile['pos']), []).append(tile)
+
+    def add_offgrid(self, tile):
+        """
+        Place an offgrid tile and add it to the spatial index
+        """
+        self.tilemap.offgrid_tiles.append(tile)
+        self.offgrid_index.setdefault(offgrid_cell(tile['pos']), []).append(tile)
     
 
     # Runs 60 times per second
@@ -75,8 +138,10 @@ class Editor:
         """
         while True:
 
-            # Event loop
+            # Event loop, any event means the frame has to be redrawn
+            dirty = False
             for event in pygame.event.get():
+                dirty = True
 
                 # Exit the application
                 if event.type == pygame.QUIT:
@@ -89,7 +154,7 @@ class Editor:
                         self.clicking = True
                         # Handle offgrid placing ONLY on first frame of mouse down
                         if not self.ongrid:
-                            self.tilemap.offgrid_tiles.append({'type' : self.tile_list[self.tile_group], 'variant' : self.tile_variant, 'pos' : (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])})
+                            self.add_offgrid({'type' : self.tile_list[self.tile_group], 'variant' : self.tile_variant, 'pos' : (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])})
                     if event.button == 3:               # Right click
                         self.right_clicking = True
                     if self.shifting:
@@ -112,91 +177,83 @@ class Editor:
                     if event.button == 3:             
                         self.right_clicking = False
                 
-                # Keystroke down
+                # Keystroke down, camera movement is polled below so only the action dispatch table is checked
                 if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_a:         # A is left
-                        self.movement[0] = True
-                    if event.key == pygame.K_d:         # D is right
-                        self.movement[1] = True
-                    if event.key == pygame.K_w:         # W is up
-                        self.movement[2] = True
-                    if event.key == pygame.K_s:         # S is down
-                        self.movement[3] = True
-                    if event.key == pygame.K_g:         # G is toggle ongrid
-                        self.ongrid = not self.ongrid
-                    if event.key == pygame.K_t:         # T is autotile
-                        self.tilemap.autotile()
-                    if event.key == pygame.K_RETURN:    # RETURN (ENTER) is save file
-                        self.tilemap.save('maps/' + str(self.level_select) + '.json')
-                        print('FILE SAVED to map ' + str(self.level_select) + ' on ' + datetime.datetime.now().strftime('%m/%d/%y at %I:%M:%S %p'))
-                    if event.key == pygame.K_l:         # L is load file
-                        try:
-                            self.tilemap.load('maps/' + str(self.level_select) + '.json')
-                        except FileNotFoundError:
-                            pass
-                    if event.key == pygame.K_l:
-                        pass
-                    if event.key == pygame.K_LSHIFT:    # SHIFT is alternate scroll (category)
-                        self.shifting = True
+                    action = self.keydown_actions.get(event.key)
+                    if action:
+                        action()
 
                 # Keystroke up
                 if event.type == pygame.KEYUP:
-                    if event.key == pygame.K_a:      
-                        self.movement[0] = False
-                    if event.key == pygame.K_d:         
-                        self.movement[1] = False
-                    if event.key == pygame.K_w:   
-                        self.movement[2] = False
-                    if event.key == pygame.K_s:     
-                        self.movement[3] = False
                     if event.key == pygame.K_LSHIFT:
                         self.shifting = False
 
-            # Draw background
-            self.display.fill((10, 30, 50))
-
-            # Camera control
-            self.scroll[0] += (self.movement[1] - self.movement[0]) * CAMERA_SPEED
-            self.scroll[1] += (self.movement[3] - self.movement[2]) * CAMERA_SPEED
-            render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
-
-            # Draw tiles
-            self.tilemap.render(self.display, offset=render_scroll)
+            # Camera control, WASD polled from the held key state (A left, D right, W up, S down)
+            keys = pygame.key.get_pressed()
+            camera_x = keys[pygame.K_d] - keys[pygame.K_a]
+            camera_y = keys[pygame.K_s] - keys[pygame.K_w]
+            self.scroll[0] += camera_x * CAMERA_SPEED
+            self.scroll[1] += camera_y * CAMERA_SPEED
+            scroll_x, scroll_y = self.scroll
+            render_scroll = (int(scroll_x), int(scroll_y))
 
             # Find placing tile
-            self.current_tile_group = self.assets[self.tile_list[self.tile_group]]
-            self.current_tile_img = self.current_tile_group[self.tile_variant].copy()
-            self.current_tile_img.set_alpha(PLACING_OPACITY)
+            tile_type = self.tile_list[self.tile_group]
+            self.current_tile_group = self.assets[tile_type]
+            self.current_tile_img = self.preview_assets[tile_type][self.tile_variant]
 
             # Find mouse position
             mpos = pygame.mouse.get_pos()
             mpos = (mpos[0] / RENDER_SCALE, mpos[1] / RENDER_SCALE)
-            tile_pos = (int((mpos[0] + self.scroll[0]) // self.tilemap.tile_size), int((mpos[1] + self.scroll[1]) // self.tilemap.tile_size))
+            tilemap = self.tilemap
+            tile_size = tilemap.tile_size
+            tile_pos = (int((mpos[0] + scroll_x) // tile_size), int((mpos[1] + scroll_y) // tile_size))
+
+            # Nothing can change onscreen without an event, camera movement, a held click or the mouse moving, so skip drawing
+            if not dirty and not camera_x and not camera_y and not self.clicking and not self.right_clicking and mpos == self.last_mpos:
+                self.clock.tick(TICK_RATE)
+                continue
+            self.last_mpos = mpos
+
+            # Draw background
+            self.display.fill((10, 30, 50))
+
+            # Draw tiles
+            tilemap.render(self.display, offset=render_scroll)
 
             # Render placing tile, offgrid if G is pressed
             if not self.clicking and not self.right_clicking:
                 if self.ongrid:
-                    self.display.blit(self.current_tile_img, (tile_pos[0] * self.tilemap.tile_size - self.scroll[0], tile_pos[1] * self.tilemap.tile_size - self.scroll[1]))
+                    self.display.blit(self.current_tile_img, (tile_pos[0] * tile_size - scroll_x, tile_pos[1] * tile_size - scroll_y))
                 else:
                     self.display.blit(self.current_tile_img, mpos)
 
             # Place and remove tile at mouse pos
             if self.clicking and self.ongrid:
-                self.tilemap.tilemap[str(tile_pos[0]) + ';' + str(tile_pos[1])] = {'type' : self.tile_list[self.tile_group], 'variant' : self.tile_variant, 'pos' : tile_pos}
+                tilemap.tilemap[tile_pos] = {'type' : tile_type, 'variant' : self.tile_variant, 'pos' : tile_pos}
+                tilemap.invalidate(tile_pos)
             if self.right_clicking:
-                tile_loc = str(tile_pos[0]) + ';' + str(tile_pos[1])
-                if tile_loc in self.tilemap.tilemap:
-                    del self.tilemap.tilemap[tile_loc]
-            # Offgrid, check every offgrid tile to see if colliding with mouse
-                for tile in self.tilemap.offgrid_tiles.copy():
-                    tile_img = self.assets[tile['type']][tile['variant']]
-                    tile_rect = pygame.Rect(tile['pos'][0] - self.scroll[0], tile['pos'][1] - self.scroll[1], tile_img.get_width(), tile_img.get_height())
-                    if tile_rect.collidepoint(mpos):
-                        self.tilemap.offgrid_tiles.remove(tile)
-
-
-            # Render display onto screen (upscaling)
-            self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()))
+                if tile_pos in tilemap.tilemap:
+                    del tilemap.tilemap[tile_pos]
+                    tilemap.invalidate(tile_pos)
+            # Offgrid, check only the offgrid tiles indexed in cells around the mouse to see if colliding with mouse
+                mouse_cell = offgrid_cell((mpos[0] + scroll_x, mpos[1] + scroll_y))
+                for cell in [(mouse_cell[0] + x, mouse_cell[1] + y) for x in (-1, 0, 1) for y in (-1, 0, 1)]:
+                    if cell not in self.offgrid_index:
+                        continue
+                    # Walk the cell backwards so hits can be deleted in place without copying the list
+                    cell_tiles = self.offgrid_index[cell]
+                    for i in range(len(cell_tiles) - 1, -1, -1):
+                        tile = cell_tiles[i]
+                        tile_img = self.assets[tile['type']][tile['variant']]
+                        tile_rect = pygame.Rect(tile['pos'][0] - scroll_x, tile['pos'][1] - scroll_y, tile_img.get_width(), tile_img.get_height())
+                        if tile_rect.collidepoint(mpos):
+                            del cell_tiles[i]
+                            tilemap.offgrid_tiles.remove(tile)
+
+
+            # Render display onto screen (upscaling straight into the screen surface, no per-frame allocation)
+            pygame.transform.scale(self.display, SCREEN_SIZE, self.screen)
 
             # Render UI
             pos_img = self.pos_text.render(str(tile_pos), True, (200, 200, 200))
@@ -2,7 +2,6 @@ import pygame
 import math
 import random
 
-from .particle import Particle
 from .hud import HudElement
 
 # Universal physics constants
@@ -13,6 +12,12 @@ RENDER_SCALE = 4.0
 DEPTHS_Y = 400
 DEPTHS_X = -300
 
+# Collision bit flags for PhysicsEntity.collisions
+COLLIDE_UP = 1
+COLLIDE_DOWN = 2
+COLLIDE_LEFT = 4
+COLLIDE_RIGHT = 8
+
 
 # Collectable constants
 COLLECTABLE_SIZES = {
@@ -43,11 +48,14 @@ COLLECTABLE_OFFSETS = {
 }
 GRUB_NOISE_DIST = 200
 ALERT_NOISE_DIST = 45
+GRUB_NOISE_DIST_SQ = GRUB_NOISE_DIST * GRUB_NOISE_DIST          # Squared distances for comparing against dist_sq_to_player
+ALERT_NOISE_DIST_SQ = ALERT_NOISE_DIST * ALERT_NOISE_DIST
 ALERT_COOLDOWN = 3
 SHINY_NOISE_DIST = 150
 NUM_PICKUP_PARTICLES = 80
 SAW_NOISE_DIST = 80
 DASH_TICK = 15
+NEAR_CELL_SIZE = 256            # Collectables outside the 3x3 cells around the player run update_far, larger than any distance they react to
 
 # Enemy constants
 CRAWLER_NOISE_DIST = 100
@@ -63,9 +71,10 @@ class PhysicsEntity:
         self.scale = scale
         self.velocity = [0,0]
         self.gravity = GRAVITY_CONST
-        self.collisions = {'up' : False, 'down' : False, 'right' : False, 'left' : False}
+        self.collisions = 0
         self.last_movement = [0,0]
         self.opacity = opacity
+        self.physics_rect = pygame.Rect(0, 0, size[0], size[1])     # Reused by update for tile collision instead of a new Rect per pass
 
         # Animation and framing
         self.action = ''
@@ -95,46 +104,63 @@ class PhysicsEntity:
         Handle entity collision and movement every frame
         """
         # Reset collision detection
-        self.collisions = {'up' : False, 'down' : False, 'right' : False, 'left' : False}
+        self.collisions = 0
 
         # Add velocity onto position
-        frame_movement = (movement[0] + self.velocity[0], movement[1] + self.velocity[1])
-
-        # Update X position based on movement
-        self.pos[0] += frame_movement[0]
-
-        # If after X position updates, a collision occurs, snap entity to left/right edge of tile
-        entity_rect = self.entity_rect()
-        for rect in tilemap.physics_rects_nearby(self.pos):
-            if entity_rect.colliderect(rect):
-                if frame_movement[0] > 0:           # Moving right, snap to left edge of tile
-                    entity_rect.right = rect.left
-                    self.collisions['right'] = True
-                if frame_movement[0] < 0:           # Moving left, snap to right edge of tile
-                    entity_rect.left = rect.right
-                    self.collisions['left'] = True
-                self.pos[0] = entity_rect.x        # Update player position based on player rect
+        fmx = movement[0] + self.velocity[0]
+        fmy = movement[1] + self.velocity[1]
+
+        # Nearby rects are cached by the tile the lookup was made from, the Y pass reuses them unless that tile changed
+        tile_size = tilemap.tile_size
+        nearby_loc = None
+
+        # Update X position based on movement, an axis that did not move cannot collide so its pass is skipped
+        if fmx:
+            self.pos[0] += fmx
+
+            # If after X position updates, a collision occurs, snap entity to left/right edge of tile
+            entity_rect = self.physics_rect
+            entity_rect.update(self.pos[0], self.pos[1], self.size[0], self.size[1])
+            nearby_loc = (int(self.pos[0] // tile_size), int(self.pos[1] // tile_size))
+            nearby = tilemap.physics_rects_nearby(self.pos)
+            # collidelist finds the first hit in C, rects before it cannot collide so the snapping loop starts there
+            first_hit = entity_rect.collidelist(nearby)
+            for rect in (nearby[first_hit:] if first_hit != -1 else ()):
+                if entity_rect.colliderect(rect):
+                    if fmx > 0:                        # Moving right, snap to left edge of tile
+                        entity_rect.right = rect.left
+                        self.collisions |= COLLIDE_RIGHT
+                    if fmx < 0:                        # Moving left, snap to right edge of tile
+                        entity_rect.left = rect.right
+                        self.collisions |= COLLIDE_LEFT
+                    self.pos[0] = entity_rect.x        # Update player position based on player rect
 
         # Update Y position
-        self.pos[1] += frame_movement[1]
-
-        # If after Y position updates, a collision occurs, snap entity to top/bottom edge of tile
-        entity_rect = self.entity_rect()
-        for rect in tilemap.physics_rects_nearby(self.pos):
-            if entity_rect.colliderect(rect):
-                if frame_movement[1] > 0:           # Moving down, snap to top edge of tile
-                    entity_rect.bottom = rect.top
-                    self.collisions['down'] = True
-                if frame_movement[1] < 0:           # Moving up, snap to bottom edge of tile
-                    entity_rect.top = rect.bottom
-                    self.collisions['up'] = True
-                self.pos[1] = entity_rect.y        # Update player position based on player rect
+        if fmy:
+            self.pos[1] += fmy
+
+            # If after Y position updates, a collision occurs, snap entity to top/bottom edge of tile
+            entity_rect = self.physics_rect
+            entity_rect.update(self.pos[0], self.pos[1], self.size[0], self.size[1])
+            loc = (int(self.pos[0] // tile_size), int(self.pos[1] // tile_size))
+            if loc != nearby_loc:
+                nearby = tilemap.physics_rects_nearby(self.pos)
+            first_hit = entity_rect.collidelist(nearby)
+            for rect in (nearby[first_hit:] if first_hit != -1 else ()):
+                if entity_rect.colliderect(rect):
+                    if fmy > 0:                        # Moving down, snap to top edge of tile
+                        entity_rect.bottom = rect.top
+                        self.collisions |= COLLIDE_DOWN
+                    if fmy < 0:                        # Moving up, snap to bottom edge of tile
+                        entity_rect.top = rect.bottom
+                        self.collisions |= COLLIDE_UP
+                    self.pos[1] = entity_rect.y        # Update player position based on player rect
 
         # Add gravity and cap terminal velocity
         self.velocity[1] = min(TERMINAL_VELOCITY, self.velocity[1] + self.gravity)
 
         # Reset gravity if on ground or bonking head on ceiling
-        if self.collisions['down'] or self.collisions['up']:
+        if self.collisions & (COLLIDE_DOWN | COLLIDE_UP):
             self.velocity[1] = 0
 
         # Flip sprite on turn around
@@ -147,14 +173,29 @@ class PhysicsEntity:
         self.last_movement = movement
         self.animation.update()
 
+
+    def in_view(self, offset, view_size):
+        """
+        Returns True if the current animation frame overlaps a view of view_size at the camera offset
+        Scalar bounds check so offscreen entities can skip render entirely
+        """
+        img = self.animation.current
+        x = self.pos[0] - offset[0] + self.anim_offset[0]
+        y = self.pos[1] - offset[1] + self.anim_offset[1]
+        return x + img.get_width() * self.scale >= 0 and x < view_size[0] and y + img.get_height() * self.scale >= 0 and y < view_size[1]
     
+    def get_blit(self, offset=(0,0)):
+        """
+        Return (image, position) for this frame taking flip and offset into account
+        Lets the game batch a whole group of entities into a single fblits call
+        """
+        return (self.animation.img(self.flip, self.vert_flip, self.scale), (self.pos[0] - offset[0] + self.anim_offset[0], self.pos[1] - offset[1] + self.anim_offset[1]))
+
     def render(self, surf, offset=(0,0)):
         """
         Render entity onto surface taking flip and offset into account
         """
-        flipped_img = pygame.transform.flip(self.animation.img(), self.flip, self.vert_flip)
-        scaled_img = pygame.transform.scale_by(flipped_img, self.scale)
-        surf.blit(scaled_img, (self.pos[0] - offset[0] + self.anim_offset[0], self.pos[1] - offset[1] + self.anim_offset[1]))
+        surf.blit(*self.get_blit(offset))
 
 
 
@@ -170,7 +211,7 @@ class Collectable(PhysicsEntity):
     
     def __init__(self, game, pos, c_type, scale=1.0, x_collisions=False):
         self.game = game
-        self.pos = (pos[0] + COLLECTABLE_OFFSETS[c_type][0], pos[1] + COLLECTABLE_OFFSETS[c_type][1])
+        self.pos = [pos[0] + COLLECTABLE_OFFSETS[c_type][0], pos[1] + COLLECTABLE_OFFSETS[c_type][1]]
         self.type = c_type
         self.size = COLLECTABLE_SIZES[c_type]
         self.scale = scale
@@ -186,12 +227,46 @@ class Collectable(PhysicsEntity):
         self.shade_noise_timer = 0
         self.alerted = False
         
-        self.dist_to_player = 0
+        self.dist_sq_to_player = 0
         self.x_dist = 0
         self.y_dist = 0
-        self.rect = 0
+        self.rect = self.entity_rect()
         self.player_rect = 0
+
+        # Collectables never move, so their cell is fixed; pickups and saws set sound volumes from the player distance every frame
+        self.cell = (self.rect.centerx // NEAR_CELL_SIZE, self.rect.centery // NEAR_CELL_SIZE)
+        self.always_near = self.type == 'collectables/saw' or self.type[-6:] == 'pickup'
+        self.is_grub = c_type == 'grub'
         
+    @property
+    def dist_to_player(self):
+        """
+        Distance to the player, only square rooted where a sound volume needs the real distance
+        """
+        return math.sqrt(self.dist_sq_to_player)
+
+    def is_near(self, player_cell):
+        """
+        Returns True if the full update must run: within the 3x3 cells around player_cell, being collected, or always near
+        """
+        return self.always_near or self.collect_timer > 0 or (abs(self.cell[0] - player_cell[0]) <= 1 and abs(self.cell[1] - player_cell[1]) <= 1)
+
+    def update_far(self):
+        """
+        Cheap update for collectables too far away to collide with, hear or react to the player
+        Only ticks animation and timers, keeping grub and shade gate state the same as update() would
+        """
+        self.animation.update()
+        self.idle_noise_timer += 1
+        self.alert_noise_timer += 1
+        self.shade_noise_timer += 1
+        self.alerted = False
+
+        if self.type == 'collectables/shade_gate':
+            self.x_collisions = not (self.game.player.cloak_timer > 0 and self.game.player.cloak_timer < DASH_TICK)
+
+        if self.is_grub:
+            self.set_action('alert' if self.alert_noise_timer < TICK_RATE * ALERT_COOLDOWN else 'idle')
 
     def update(self):
         """
@@ -207,19 +282,48 @@ class Collectable(PhysicsEntity):
         if self.collect_timer > 0:
             self.collect_timer += 1
 
-        # Update distance to player
-        self.rect = self.entity_rect()
+        # Collected grubs no longer react to the player, they only play their timed effects then animate while burrowing away
+        if self.is_grub and self.collect_timer > 0:
+            if self.collect_timer > 140:
+                return
+
+            # After Collection (AC)
+
+            # Glass break and fades out (and stop sad noises)
+            if self.collect_timer == 2:
+                self.game.grubs_collected += 1
+                self.game.sfx['grub_sad_idle_1'].stop()
+                self.game.sfx['grub_sad_idle_2'].stop()
+                self.game.sfx['grub_break'].play()
+                self.game.sfx['grub_break'].fadeout(1200)
+
+                for i in range(30):
+                        self.game.spawn_particle('slide_particle', self.rect.center, velocity=(random.uniform(-3, 3), random.uniform(-2, 3)))
+            
+
+            # Happy grub noises
+            if self.collect_timer == 50:
+                rand = random.randint(1, 3)
+                self.game.sfx_grub_free[rand - 1].play()
+
+            # Burrowing away
+            if self.collect_timer == 140:
+                self.game.sfx['grub_burrow'].play()
+
+            return
+
+        # Update distance to player, the collectable's own rect is built once in __init__ since it never moves
         self.player_rect = self.game.player.entity_rect()
         self.x_dist = self.rect.centerx - self.player_rect.centerx
         self.y_dist = self.rect.centery - self.player_rect.centery
-        self.dist_to_player = math.sqrt(self.x_dist**2 + self.y_dist**2)
+        self.dist_sq_to_player = self.x_dist * self.x_dist + self.y_dist * self.y_dist
 
         # Call collect actions every frame when in contact with player
         if self.rect.colliderect(self.player_rect):
             self.collect()
 
         # Update alerted status for grubs
-        if self.dist_to_player >= ALERT_NOISE_DIST:
+        if self.dist_sq_to_player >= ALERT_NOISE_DIST_SQ:
             self.alerted = False
 
         # Flash circle particle for pickup items
@@ -227,21 +331,23 @@ class Collectable(PhysicsEntity):
 
             # Every other second, pulse circle particle
             if self.idle_noise_timer % TICK_RATE * 2 == 0:
-                self.game.particles.append(Particle(self.game, 'circle_particle', self.rect.center, scale=2, opacity= 255 / 3, fade_out=1.3))
+                self.game.spawn_particle('circle_particle', self.rect.center, scale=2, opacity= 255 / 3, fade_out=1.3)
         
             # Every 5 seconds, play shiny sound
-            self.game.sfx['shiny_item'].set_volume((SHINY_NOISE_DIST - self.dist_to_player) / (SHINY_NOISE_DIST * 2))
-            if self.idle_noise_timer % TICK_RATE * 5 == 0 and self.dist_to_player < SHINY_NOISE_DIST:
+            dist_to_player = self.dist_to_player
+            self.game.sfx['shiny_item'].set_volume((SHINY_NOISE_DIST - dist_to_player) / (SHINY_NOISE_DIST * 2))
+            if self.idle_noise_timer % TICK_RATE * 5 == 0 and dist_to_player < SHINY_NOISE_DIST:
                 self.game.sfx['shiny_item'].play()
 
         # Play saw blade sound effect
         if self.type == 'collectables/saw':
-            self.game.sfx['saw_loop'].set_volume(min(0.2, (SAW_NOISE_DIST - self.dist_to_player) / (SAW_NOISE_DIST)))
-            if self.idle_noise_timer % 100 == 1 and self.dist_to_player < SAW_NOISE_DIST * 1.2:
+            dist_to_player = self.dist_to_player
+            self.game.sfx['saw_loop'].set_volume(min(0.2, (SAW_NOISE_DIST - dist_to_player) / (SAW_NOISE_DIST)))
+            if self.idle_noise_timer % 100 == 1 and dist_to_player < SAW_NOISE_DIST * 1.2:
                 self.game.sfx['saw_loop'].play()
 
         # Saw has circular appearance, use distance from center for collision detection
-        if self.type == 'collectables/saw' and self.dist_to_player < COLLECTABLE_SIZES['saw'][0] - 10:
+        if self.type == 'collectables/saw' and dist_to_player < COLLECTABLE_SIZES['saw'][0] - 10:
             self.game.damage_fade_out = True
 
         # Spawn floating void particles and handle collision
@@ -254,8 +360,8 @@ class Collectable(PhysicsEntity):
                 self.x_collisions = True
             
             # Spawn waves of particles
-            if self.dist_to_player < 250 and random.randint(0, 1) == 1:
-                self.game.particles.append(Particle(self.game, 'long_cloak_particle', (self.rect.centerx + random.uniform(-2, 2), self.rect.centery + random.uniform(-8, 8)), velocity=(random.uniform(-0.4,0.4), random.uniform(-0.05,0.05)), fade_out=2, frame=random.randint(1,4)))
+            if self.dist_sq_to_player < 250 ** 2 and random.randint(0, 1) == 1:
+                self.game.spawn_particle('long_cloak_particle', (self.rect.centerx + random.uniform(-2, 2), self.rect.centery + random.uniform(-8, 8)), velocity=(random.uniform(-0.4,0.4), random.uniform(-0.05,0.05)), fade_out=2, frame=random.randint(1,4))
 
 
         # Drop nearest gate and play sfx
@@ -294,24 +400,24 @@ class Collectable(PhysicsEntity):
                 closest_gate.x_collisions = False
 
         # Play time based grub sound effects
-        if self.type == 'collectables/grub':
+        if self.is_grub:
 
             # Before Collection (BC)
 
             if self.collect_timer == 0:
 
                 # Sad grub noises if within distance and after random interval of seconds
-                if self.dist_to_player < GRUB_NOISE_DIST and self.dist_to_player > ALERT_NOISE_DIST and self.idle_noise_timer > random.randint(5, 25) * TICK_RATE and self.game.player.pos[1] < DEPTHS_Y:
+                if self.dist_sq_to_player < GRUB_NOISE_DIST_SQ and self.dist_sq_to_player > ALERT_NOISE_DIST_SQ and self.idle_noise_timer > random.randint(5, 25) * TICK_RATE and self.game.player.pos[1] < DEPTHS_Y:
                     rand_sound = random.randint(1, 2)
                     rand_chance = random.randint(1, 20)
 
                     if rand_chance == 1:
                         self.idle_noise_timer = 0
-                        self.game.sfx['grub_sad_idle_' + str(rand_sound)].set_volume(max(0.12, (GRUB_NOISE_DIST - self.dist_to_player) / (GRUB_NOISE_DIST * 2.5)))
-                        self.game.sfx['grub_sad_idle_' + str(rand_sound)].play()
+                        self.game.sfx_grub_sad[rand_sound - 1].set_volume(max(0.12, (GRUB_NOISE_DIST - self.dist_to_player) / (GRUB_NOISE_DIST * 2.5)))
+                        self.game.sfx_grub_sad[rand_sound - 1].play()
 
                 # Update alert status when player is very close
-                if self.dist_to_player < ALERT_NOISE_DIST and abs(self.y_dist) < ALERT_NOISE_DIST / 100:
+                if self.dist_sq_to_player < ALERT_NOISE_DIST_SQ and abs(self.y_dist) < ALERT_NOISE_DIST / 100:
 
                     # only play alert sound if havent played in ALERT_COOLDOWN seconds
                     if self.alert_noise_timer > TICK_RATE * ALERT_COOLDOWN and not self.alerted:
@@ -328,28 +434,6 @@ class Collectable(PhysicsEntity):
                 else:
                     self.set_action('idle')
 
-            # After Collection (AC)
-
-            # Glass break and fades out (and stop sad noises)
-            if self.collect_timer == 2:
-                self.game.grubs_collected += 1
-                self.game.sfx['grub_sad_idle_1'].stop()
-                self.game.sfx['grub_sad_idle_2'].stop()
-                self.game.sfx['grub_break'].play()
-                self.game.sfx['grub_break'].fadeout(1200)
-
-                for i in range(30):
-                        self.game.particles.append(Particle(self.game, 'slide_particle', self.entity_rect().center, velocity=(random.uniform(-3, 3), random.uniform(-2, 3))))
-            
-
-            # Happy grub noises
-            if self.collect_timer == 50:
-                rand = random.randint(1, 3)
-                self.game.sfx['grub_free_' + str(rand)].play()
-
-            # Burrowing away
-            if self.collect_timer == 140:
-                self.game.sfx['grub_burrow'].play()
 
         
     def collect(self):
@@ -362,7 +446,7 @@ class Collectable(PhysicsEntity):
             self.game.player_spawn_pos = self.pos.copy()
 
         # Start save animation
-        if self.type == 'collectables/grub':
+        if self.is_grub:
             self.set_action('collect')
 
         # Lever pull animation
@@ -380,11 +464,11 @@ class Collectable(PhysicsEntity):
         # Collide with player
         if self.x_collisions:
             if self.player_rect.centerx < self.rect.centerx:
-                self.game.player.collisions['right'] = True
+                self.game.player.collisions |= COLLIDE_RIGHT
                 self.player_rect.right = self.rect.left
                 self.game.player.entity_x_colliding = 0
             else:
-                self.game.player.collisions['left'] = True
+                self.game.player.collisions |= COLLIDE_LEFT
                 self.player_rect.left = self.rect.right
                 self.game.player.entity_x_colliding = 1
             self.game.player.pos[0] = self.player_rect.x
@@ -419,12 +503,16 @@ class Collectable(PhysicsEntity):
             self.game.sfx['ability_info'].play()
             self.game.sfx['ability_pickup'].play()
             self.game.collectables.remove(self)
+            uniform = random.uniform
+            spawn_particle = self.game.spawn_particle
+            burst_pos = self.game.player.entity_rect().center
             for i in range(NUM_PICKUP_PARTICLES):
-                hitstun_particle_vel = (random.uniform(-2, 2), random.uniform(-2, 2))
-                self.game.particles.append(Particle(self.game, particle_type, self.game.player.entity_rect().center, hitstun_particle_vel, frame=0))
+                hitstun_particle_vel = (uniform(-2, 2), uniform(-2, 2))
+                spawn_particle(particle_type, burst_pos, hitstun_particle_vel, frame=0)
+            burst_pos = self.rect.center
             for i in range(NUM_PICKUP_PARTICLES):
-                hitstun_particle_vel = (random.uniform(-2, 2), random.uniform(-2, 2))
-                self.game.particles.append(Particle(self.game, particle_type, self.entity_rect().center, hitstun_particle_vel, frame=0))
+                hitstun_particle_vel = (uniform(-2, 2), uniform(-2, 2))
+                spawn_particle(particle_type, burst_pos, hitstun_particle_vel, frame=0)
             
             return
 
@@ -450,12 +538,13 @@ class Enemy(PhysicsEntity):
         if self.type == 'enemies/wall_creeper':
             if self.tilemap.tile_solid((self.rect.centerx - 10, self.pos[1] + 4)):
                 self.flip = True
-                self.pos[0] = self.pos[0] + 0
             else:
                 self.flip = False
 
     def update(self, movement=(0, 0)):
-
+        """
+        Return True if the enemy was destroyed this frame and should be deleted
+        """
         # Update timers
         self.idle_noise_timer += 1
         
@@ -468,14 +557,14 @@ class Enemy(PhysicsEntity):
 
         # Avoid updating if player is no where near
         if self.dist_to_player > 400:
-            return
+            return False
 
         
         # Crawling enemy that walkes back and forth
         if self.type == 'enemies/crawlid':
 
             # If running into wall, turn around
-            if self.collisions['left'] or self.collisions['right']:
+            if self.collisions & (COLLIDE_LEFT | COLLIDE_RIGHT):
                 self.flip = not self.flip
 
             # Move forward until there isn't a solid tile in front, then turn around
@@ -495,7 +584,7 @@ class Enemy(PhysicsEntity):
         if self.type == 'enemies/wall_creeper':
 
             # If bump into ceiling or wall, flip direction
-            if self.collisions['up'] or self.collisions['down']:
+            if self.collisions & (COLLIDE_UP | COLLIDE_DOWN):
                 self.vert_flip = not self.vert_flip
 
             # Move forward until there isn't a solid tile in front, then turn around
@@ -518,9 +607,8 @@ class Enemy(PhysicsEntity):
             self.game.sfx['wall_creeper'].stop()
             self.game.sfx['shade_gate_repel'].play()
             for i in range(15):
-                self.game.particles.append(Particle(self.game, 'cloak_particle', self.rect.center, (random.uniform(-1, 1), random.uniform(-1, 1))))
-            self.game.enemies.remove(self)
-            return
+                self.game.spawn_particle('cloak_particle', self.rect.center, (random.uniform(-1, 1), random.uniform(-1, 1)))
+            return True
         
         # Damage player if too close, tangible, and not cloaking
         elif self.dist_to_player < min(self.size[0], self.size[1]) - 6 and self.game.player.intangibility_timer < 0 and (self.game.player.cloak_timer == 0 or self.game.player.cloak_timer > DASH_TICK):
@@ -528,5 +616,6 @@ class Enemy(PhysicsEntity):
 
         # Update position based on movement
         super().update(self.game.tilemap, movement=movement)
+        return False
 
     
\ No newline at end of file
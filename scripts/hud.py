@@ -20,8 +20,14 @@ class HudElement:
         self.fixed = fixed
         self.alive_tick = 0
 
-    def update(self):
+        # Blit img into surface for transparency once, only the surface alpha changes while fading
+        self.hud_surf = pygame.Surface(self.image.get_size(), pygame.SRCALPHA)
+        self.hud_surf.blit(self.image, (0, 0))
 
+    def update(self):
+        """
+        Return True once the element has faded out and should be deleted
+        """
         self.alive_tick += 1
 
         # Fade in
@@ -33,17 +39,16 @@ class HudElement:
             self.opacity = max(0, self.opacity - 255 // self.fadeout_tick)
 
         # Delete once faded out
-        if self.alive_tick > self.onscreen_tick + self.fadeout_tick and not self.fixed or self.opacity == 0:
-            self.game.hud.remove(self)
-        
+        return self.alive_tick > self.onscreen_tick + self.fadeout_tick and not self.fixed or self.opacity == 0
 
-    def render(self, surf):
+    def get_blit(self):
+        """
+        Return (image, position) with the current opacity applied, for batching hud draws into one fblits call
+        """
+        self.hud_surf.set_alpha(self.opacity)
 
-        hud_img = self.image.copy()
-        
-        # Blit img into surface for transparency
-        hud_surf = pygame.Surface(hud_img.get_size(), pygame.SRCALPHA)
-        hud_surf.blit(hud_img, (0, 0))
-        hud_surf.set_alpha(self.opacity)
+        return (self.hud_surf, self.pos)
+
+    def render(self, surf):
 
-        surf.blit(hud_surf, self.pos)
\ No newline at end of file
+        surf.blit(*self.get_blit())
\ No newline at end of file
@@ -3,14 +3,28 @@ import pygame
 FOLLOW_OFFSET = (4, 5)
 
 class Particle:
-    
+
+    # Fixed attribute layout; particles are the most numerous objects updated every frame
+    __slots__ = ('game', 'type', 'pos', 'velocity', 'animation', 'flip', 'follow', 'scale', 'opacity', 'fade_out')
+
     def __init__(self, game, p_type, pos, velocity=[0,0], frame=0, flip=False, follow_player=False, scale=1.0, opacity=255, fade_out=0):
         self.game = game
-        self.type = p_type
+        self.type = None
+        self.animation = None
+        self.reset(p_type, pos, velocity, frame, flip, follow_player, scale, opacity, fade_out)
+
+    def reset(self, p_type, pos, velocity=[0,0], frame=0, flip=False, follow_player=False, scale=1.0, opacity=255, fade_out=0):
+        """
+        Reinitialize a dead particle so it can be reused from the game's particle pool
+        Keeps the existing animation instance when the particle type is unchanged
+        """
+        if p_type != self.type:
+            self.type = p_type
+            self.animation = self.game.assets['particle/' + p_type].copy()
+        self.animation.done = False
+        self.animation.set_frame(frame)
         self.pos = list(pos)
         self.velocity = list(velocity)
-        self.animation = self.game.assets['particle/' + p_type].copy()
-        self.animation.frame = frame
         self.flip = flip
         self.follow = follow_player
         self.scale = scale
@@ -35,16 +49,33 @@ class Particle:
 
         return kill
     
-    def render(self, surf, offset=(0,0)):
+    def get_blit(self, offset=(0,0), view_size=None):
         """
-        Render with offset, centered around particle img center, opacity, and scale
+        Return (image, position) for this frame with offset, centered around particle img center, opacity, and scale
+        Lets the game batch every particle into a single fblits call
+        Returns None without scaling anything if the particle lies outside a view of view_size
         """
-        img = self.animation.img()
+        img = self.animation.current
+
+        # Cull against the camera view with scalar compares before paying for the scale
+        if view_size is not None:
+            half_w = img.get_width() * self.scale / 2
+            half_h = img.get_height() * self.scale / 2
+            x = (self.game.player.pos[0] + FOLLOW_OFFSET[0] if self.follow else self.pos[0]) - offset[0]
+            y = (self.game.player.pos[1] + FOLLOW_OFFSET[1] if self.follow else self.pos[1]) - offset[1]
+            if x + half_w < 0 or x - half_w > view_size[0] or y + half_h < 0 or y - half_h > view_size[1]:
+                return None
 
         img.set_alpha(self.opacity)
         img = pygame.transform.scale(img, (int(img.get_width() * self.scale), int(img.get_height() * self.scale)))
 
         if not self.follow:
-            surf.blit(img, (self.pos[0] - offset[0] - img.get_width() // 2, self.pos[1] - offset[1] - img.get_height() // 2))
+            return (img, (self.pos[0] - offset[0] - img.get_width() // 2, self.pos[1] - offset[1] - img.get_height() // 2))
         else:
-            surf.blit(pygame.transform.flip(img, self.flip, False), (self.game.player.pos[0] - offset[0] - img.get_width() // 2 + FOLLOW_OFFSET[0] , self.game.player.pos[1] - offset[1] - img.get_height() // 2 + FOLLOW_OFFSET[1] ))
\ No newline at end of file
+            return (pygame.transform.flip(img, self.flip, False), (self.game.player.pos[0] - offset[0] - img.get_width() // 2 + FOLLOW_OFFSET[0] , self.game.player.pos[1] - offset[1] - img.get_height() // 2 + FOLLOW_OFFSET[1] ))
+
+    def render(self, surf, offset=(0,0)):
+        """
+        Render with offset, centered around particle img center, opacity, and scale
+        """
+        surf.blit(*self.get_blit(offset))
\ No newline at end of file
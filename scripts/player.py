@@ -2,8 +2,7 @@ import pygame
 import math
 import random
 
-from .entities import PhysicsEntity
-from .particle import Particle
+from .entities import PhysicsEntity, COLLIDE_DOWN, COLLIDE_LEFT, COLLIDE_RIGHT
 from .hud import HudElement
 
 # Universal physics constants
@@ -121,7 +120,7 @@ class Player(PhysicsEntity):
 
         # Apply fast horizontal movement while dashing
         elif abs(self.dash_timer) > 0:
-            movement = (math.copysign(1.0, self.dash_timer) * DASH_X_SCALE, movement[1])
+            movement = (DASH_X_SCALE if self.dash_timer > 0 else -DASH_X_SCALE, movement[1])
 
         # Apply normal horizontal movement scale anytime else
         else:
@@ -129,11 +128,11 @@ class Player(PhysicsEntity):
 
 
         # Suspend gravity completely while dashing
-        if abs(self.dash_timer) > 0:
+        if self.dash_timer:
             self.gravity = 0
 
         # Minimize gravity at the peak of player jump to add precision
-        elif self.air_time > AIRTIME_BUFFER and self.velocity[1] > -LOW_GRAV_THRESHOLD and self.velocity[1] < LOW_GRAV_THRESHOLD:
+        elif self.air_time > AIRTIME_BUFFER and -LOW_GRAV_THRESHOLD < self.velocity[1] < LOW_GRAV_THRESHOLD:
             self.gravity = GRAVITY_CONST / LOW_GRAV_DIVISOR
         
         # Reset to normal gravity elsewise
@@ -148,10 +147,10 @@ class Player(PhysicsEntity):
         # Check for entity collision from left or right
         self.entity_collision = False
         if self.entity_x_colliding == 0:
-            self.collisions['left'] = True
+            self.collisions |= COLLIDE_LEFT
             self.entity_collision = True
         if self.entity_x_colliding == 1:
-            self.collisions['right'] = True
+            self.collisions |= COLLIDE_RIGHT
             self.entity_collision = True
         self.entity_x_colliding = -1
 
@@ -162,11 +161,14 @@ class Player(PhysicsEntity):
         elif self.pos[1] > DEPTHS_Y * 4:
             self.game.damage_fade_out = True
 
+        # Position is final for this frame, build the player rect once for the spike check and particle spawns below
+        player_rect = self.entity_rect()
+
         # Void out and death warp if player collides with spike tiles downwards
-        below_tile = self.game.tilemap.tile_below(self.entity_rect().center)
+        below_tile = self.game.tilemap.tile_below(player_rect.center)
         if below_tile == None:
             below_tile = {'type': 'air', 'variant': 0}
-        if below_tile['type'] == 'spikes' and self.collisions['down'] == True and abs(self.dash_timer) == 0:
+        if below_tile['type'] == 'spikes' and self.collisions & COLLIDE_DOWN and abs(self.dash_timer) == 0:
             self.game.damage_fade_out = True
 
         # Update movement control variables
@@ -191,7 +193,7 @@ class Player(PhysicsEntity):
             self.dash_timer = min(0, self.dash_timer + 1)
 
         # Reset mobility upon touching ground
-        if self.collisions['down']:
+        if self.collisions & COLLIDE_DOWN:
             self.jumps = NUM_AIR_JUMPS
             self.dashes = NUM_AIR_DASHES
             self.air_jumping = 0
@@ -204,14 +206,14 @@ class Player(PhysicsEntity):
                     self.game.sfx['land_hard'].play()
                     # Large dust plume
                     for i in range(40):
-                        self.game.particles.append(Particle(self.game, 'slide_particle', self.entity_rect().midbottom, velocity=(random.uniform(-2.5, 2.5), random.uniform(0, 0.5))))
+                        self.game.spawn_particle('slide_particle', player_rect.midbottom, velocity=(random.uniform(-2.5, 2.5), random.uniform(0, 0.5)))
                 
                 # Normal landing
                 else:
                     self.game.sfx['land'].play()
                     # Dust plume
                     for i in range(10):
-                        self.game.particles.append(Particle(self.game, 'run_particle', self.entity_rect().midbottom, velocity=(random.uniform(-0.5, 0.5), random.uniform(0.1, 0.3))))
+                        self.game.spawn_particle('run_particle', player_rect.midbottom, velocity=(random.uniform(-0.5, 0.5), random.uniform(0.1, 0.3)))
             
             self.game.sfx['falling'].stop()
             self.air_time = 0
@@ -242,7 +244,7 @@ class Player(PhysicsEntity):
             pass
 
         # WALL SLIDE, reduce Y ďpeed if touching wall
-        elif (self.collisions['right'] or self.collisions['left']) and self.air_time > AIRTIME_BUFFER and self.velocity[1] > 0 and self.has_claw and not self.entity_collision and self.dash_cooldown_timer > 1:
+        elif self.collisions & (COLLIDE_RIGHT | COLLIDE_LEFT) and self.air_time > AIRTIME_BUFFER and self.velocity[1] > 0 and self.has_claw and not self.entity_collision and self.dash_cooldown_timer > 1:
 
             # Only play grabbing wall sound if not touching wall previously
             if self.wall_slide_timer > AIRTIME_BUFFER:
@@ -255,7 +257,7 @@ class Player(PhysicsEntity):
             # Set wall slide flagging variables
             self.wall_slide = True
             self.wall_slide_timer = 0
-            self.wall_slide_right = True if self.collisions['right'] else False
+            self.wall_slide_right = True if self.collisions & COLLIDE_RIGHT else False
 
             self.sliding_time += 1
             if self.sliding_time == 1:
@@ -267,7 +269,6 @@ class Player(PhysicsEntity):
             self.set_action('wall_slide') 
 
             # Wall slide animation facing right, opposite of wall
-            player_rect = self.entity_rect()
             if self.wall_slide_right:
                 self.flip = False
                 slide_particle_pos = player_rect.midright
@@ -278,16 +279,16 @@ class Player(PhysicsEntity):
             # Wall slide particles
             slide_particle_start_f = random.randint(0, 2)
             slide_particle_vel = (0, random.randint(1, 4) / 2)
-            self.game.particles.append(Particle(self.game, 'slide_particle', slide_particle_pos, velocity=slide_particle_vel, frame=slide_particle_start_f))
+            self.game.spawn_particle('slide_particle', slide_particle_pos, velocity=slide_particle_vel, frame=slide_particle_start_f)
 
         # DASH animation 
         elif abs(self.dash_timer) > 0:
             self.set_action(self.dash_type)     
             self.anim_offset = DASH_ANIM_OFFSET
             # Dash particles 
-            if not self.collisions['left'] and not self.collisions['right']:
-                dash_trail_pos = (self.entity_rect().centerx, self.entity_rect().centery + random.randint(-1, 1) / DASH_TRAIL_VARIANCE)
-                self.game.particles.append(Particle(self.game, self.dash_type + '_particle', dash_trail_pos, velocity=(0,0), frame=0))
+            if not self.collisions & (COLLIDE_LEFT | COLLIDE_RIGHT):
+                dash_trail_pos = (player_rect.centerx, player_rect.centery + random.randint(-1, 1) / DASH_TRAIL_VARIANCE)
+                self.game.spawn_particle(self.dash_type + '_particle', dash_trail_pos, velocity=(0,0), frame=0)
 
         # AIRTIME, buffer for small amounts of airtime flashing animation
         elif self.air_time > AIRTIME_BUFFER:
@@ -295,12 +296,12 @@ class Player(PhysicsEntity):
                 self.set_action('jump') 
                 # Drifting random wing particles while rising
                 if self.air_jumping > 0 and self.air_jumping < 16:
-                    self.game.particles.append(Particle(self.game, 'long_slide_particle', (self.entity_rect().centerx + random.randint(-10, 10), self.entity_rect().centery), velocity=(random.uniform(-0.1, 0.1), random.uniform(0, 0.2))))
+                    self.game.spawn_particle('long_slide_particle', (player_rect.centerx + random.randint(-10, 10), player_rect.centery), velocity=(random.uniform(-0.1, 0.1), random.uniform(0, 0.2)))
             else:
                 self.set_action('fall')  
 
         # RUN if moving and not moving into a wall
-        elif movement[0] != 0 and not self.collisions['left'] and not self.collisions['right']:
+        elif movement[0] != 0 and not self.collisions & (COLLIDE_LEFT | COLLIDE_RIGHT):
             self.set_action('run') 
             idling = False
             self.running_time += 1
@@ -309,7 +310,7 @@ class Player(PhysicsEntity):
             if self.wall_jump_timer % RUN_PARTICLE_DELAY == 0:
                 run_particle_start_f = random.randint(0, 1)
                 run_particle_vel = (random.randint(-1, 1) / 3, random.randint(-1, 1) / 5)
-                self.game.particles.append(Particle(self.game, 'run_particle', self.entity_rect().midbottom, velocity=run_particle_vel, frame=run_particle_start_f))
+                self.game.spawn_particle('run_particle', player_rect.midbottom, velocity=run_particle_vel, frame=run_particle_start_f)
 
             # Determine ground material while walking for running sounds
             below_tile = self.game.tilemap.tile_below(self.pos)
@@ -403,7 +404,7 @@ class Player(PhysicsEntity):
             self.air_time = AIRTIME_BUFFER + 1
 
             for i in range(5):
-                    self.game.particles.append(Particle(self.game, 'run_particle', particle_loc, velocity=(random.uniform(-0.1, 0.1), random.uniform(-0.1, 0.3))))
+                    self.game.spawn_particle('run_particle', particle_loc, velocity=(random.uniform(-0.1, 0.1), random.uniform(-0.1, 0.3)))
             return True
         
         # Normal and double jump if grounded or not
@@ -411,20 +412,20 @@ class Player(PhysicsEntity):
 
             # Mid Air jump             
             if self.air_time > AIRTIME_BUFFER * 2 and self.has_wings:
-                self.jumps = min(0, self.jumps - 1)
+                self.jumps -= 1
                 self.velocity[1] = AIR_JUMP_Y_VEL
                 self.air_jumping = 1
                 self.game.sfx['wings'].play()
 
                 # Midair wing jump particle: 1 for wing animation, 6 bursts in each downward direction
                 self.player_rect = self.entity_rect()
-                self.game.particles.append(Particle(self.game, 'wings_particle', self.player_rect.center, velocity=(0, 0), flip=self.flip, follow_player=True))
-                self.game.particles.append(Particle(self.game, 'long_slide_particle', self.player_rect.center, velocity=(-0.1, 0.3)))
-                self.game.particles.append(Particle(self.game, 'long_slide_particle', self.player_rect.center, velocity=(0.1, 0.3)))
-                self.game.particles.append(Particle(self.game, 'long_slide_particle', self.player_rect.midleft + (2,0), velocity=(-0.2, 0.2)))
-                self.game.particles.append(Particle(self.game, 'long_slide_particle', self.player_rect.midright + (-2,0), velocity=(0.2, 0.2)))
-                self.game.particles.append(Particle(self.game, 'long_slide_particle', self.player_rect.midleft, velocity=(-0.4, 0.1)))
-                self.game.particles.append(Particle(self.game, 'long_slide_particle', self.player_rect.midright, velocity=(0.4, 0.1)))
+                self.game.spawn_particle('wings_particle', self.player_rect.center, velocity=(0, 0), flip=self.flip, follow_player=True)
+                self.game.spawn_particle('long_slide_particle', self.player_rect.center, velocity=(-0.1, 0.3))
+                self.game.spawn_particle('long_slide_particle', self.player_rect.center, velocity=(0.1, 0.3))
+                self.game.spawn_particle('long_slide_particle', self.player_rect.midleft + (2,0), velocity=(-0.2, 0.2))
+                self.game.spawn_particle('long_slide_particle', self.player_rect.midright + (-2,0), velocity=(0.2, 0.2))
+                self.game.spawn_particle('long_slide_particle', self.player_rect.midleft, velocity=(-0.4, 0.1))
+                self.game.spawn_particle('long_slide_particle', self.player_rect.midright, velocity=(0.4, 0.1))
 
             # Grounded jump
             else:                                        
@@ -433,7 +434,7 @@ class Player(PhysicsEntity):
 
                 # Dust plume around jump
                 for i in range(6):
-                    self.game.particles.append(Particle(self.game, 'run_particle', self.entity_rect().midbottom, velocity=(random.uniform(-0.4, 0.4), random.uniform(-0.4, -0.1))))
+                    self.game.spawn_particle('run_particle', self.entity_rect().midbottom, velocity=(random.uniform(-0.4, 0.4), random.uniform(-0.4, -0.1)))
             
             self.air_time = AIRTIME_BUFFER + 1
             return True
@@ -475,7 +476,7 @@ class Player(PhysicsEntity):
             
             # Decrement dashes counter only in the air
             if self.air_time > AIRTIME_BUFFER:
-                self.dashes = min(0, self.dashes - 1)
+                self.dashes -= 1
 
             # Cancel wall slide
             self.sliding_time = 0
@@ -492,11 +493,11 @@ class Player(PhysicsEntity):
 
             # Burst of 5 particles head to toe in opposite direction of dash
             self.player_rect = self.entity_rect()
-            self.game.particles.append(Particle(self.game, self.dash_type + '_particle', self.player_rect.center, velocity=dash_particle_vel, frame=0))
-            self.game.particles.append(Particle(self.game, self.dash_type + '_particle', self.player_rect.midtop, velocity=dash_particle_vel, frame=0))
-            self.game.particles.append(Particle(self.game, self.dash_type + '_particle', (self.player_rect.centerx, self.player_rect.centery - self.player_rect.height / 4), velocity=dash_particle_vel, frame=0))
-            self.game.particles.append(Particle(self.game, self.dash_type + '_particle', (self.player_rect.centerx, self.player_rect.centery + self.player_rect.height / 4), velocity=dash_particle_vel, frame=0))
-            self.game.particles.append(Particle(self.game, self.dash_type + '_particle', self.player_rect.midbottom, velocity=dash_particle_vel, frame=0))
+            self.game.spawn_particle(self.dash_type + '_particle', self.player_rect.center, velocity=dash_particle_vel, frame=0)
+            self.game.spawn_particle(self.dash_type + '_particle', self.player_rect.midtop, velocity=dash_particle_vel, frame=0)
+            self.game.spawn_particle(self.dash_type + '_particle', (self.player_rect.centerx, self.player_rect.centery - self.player_rect.height / 4), velocity=dash_particle_vel, frame=0)
+            self.game.spawn_particle(self.dash_type + '_particle', (self.player_rect.centerx, self.player_rect.centery + self.player_rect.height / 4), velocity=dash_particle_vel, frame=0)
+            self.game.spawn_particle(self.dash_type + '_particle', self.player_rect.midbottom, velocity=dash_particle_vel, frame=0)
 
             self.game.sfx[self.dash_type].play()
 
@@ -520,9 +521,13 @@ class Player(PhysicsEntity):
         self.can_move = False
         self.falling_time = 0
 
+        # Particle burst, velocities scaled per component (multiplying the tuple would repeat it instead)
+        uniform = random.uniform
+        spawn_particle = self.game.spawn_particle
+        burst_pos = self.entity_rect().center
         for i in range(NUM_HITSTUN_PARTICLES):
-            hitstun_particle_vel = (random.uniform(-5, 5), random.uniform(-5, 5)) * HITSTUN_PARTICLE_VEL
-            self.game.particles.append(Particle(self.game, 'cloak_particle', self.entity_rect().center, hitstun_particle_vel, frame=0))
+            hitstun_particle_vel = (uniform(-5, 5) * HITSTUN_PARTICLE_VEL, uniform(-5, 5) * HITSTUN_PARTICLE_VEL)
+            spawn_particle('cloak_particle', burst_pos, hitstun_particle_vel, frame=0)
 
 
     def death_warp(self):
@@ -553,7 +558,7 @@ class Player(PhysicsEntity):
 
         # Loop through all entities and examine all uncollected grubs
         for entity in self.game.collectables:
-            if entity.type == 'collectables/grub' and entity.collect_timer == 0:
+            if entity.is_grub and entity.collect_timer == 0:
 
                 # Assign first in the list for comparison
                 if closest_grub is None:
@@ -574,4 +579,4 @@ class Player(PhysicsEntity):
         # Play sfx and create particle stream pointing in vector direction
         self.game.sfx['grubfather_1'].play()
         for i in range(3):
-            self.game.particles.append(Particle(self.game, 'grub_particle', player_rect.center, pointing_vector * (i + 1) * 0.75, fade_out=5, frame=4 - i))
+            self.game.spawn_particle('grub_particle', player_rect.center, pointing_vector * (i + 1) * 0.75, fade_out=5, frame=4 - i)
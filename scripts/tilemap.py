@@ -21,6 +21,11 @@ AUTOTILE_MAP = {
     tuple(sorted([(1, 0), (-1, 0), (0, 1), (0, -1)])) : 8,  # Right left up down
 }
 
+# Grid tiles are pre-rendered in square chunks of CHUNK_SIZE x CHUNK_SIZE tiles
+CHUNK_SIZE = 8
+# Tiles up/left of a chunk that may still draw into it (largest grid-placeable image is 52px tall)
+CHUNK_OVERLAP = 4
+
 # Tiles that will autotile
 AUTOTILE_TILES = {'grass', 'stone'}
 # Tiles that interact with physics and collision
@@ -31,15 +36,20 @@ class Tilemap:
     def __init__(self, game, tile_size=16):
         self.game = game
         self.tile_size = tile_size
-        self.tilemap = {}
+        self.tilemap = {}                       # (x, y) grid location -> tile, stored as 'x;y' strings only in map files
         self.offgrid_tiles = []
+        self.chunk_cache = {}                   # (chunk x, chunk y) -> pre-rendered Surface of its grid tiles, None if empty
+        self.chunk_view = None                  # (offset, view size) that chunk_blits was gathered for, None after any chunk change
+        self.chunk_blits = []
+        self.physics_cache = {}                 # (x, y) grid location -> Rect list physics_rects_nearby returned for it
 
     def save(self, path):
         """
         Write tilemap info to maps.JSON
         """
+        tilemap = {str(loc[0]) + ';' + str(loc[1]) : tile for loc, tile in self.tilemap.items()}
         fil = open(path, 'w')
-        json.dump({'tilemap': self.tilemap, 'tile_size': self.tile_size, 'offgrid': self.offgrid_tiles}, fil)
+        json.dump({'tilemap': tilemap, 'tile_size': self.tile_size, 'offgrid': self.offgrid_tiles}, fil)
         fil.close()
 
     def load(self, path):
@@ -50,9 +60,15 @@ class Tilemap:
         map_data = json.load(fil)
         fil.close()
 
-        self.tilemap = map_data['tilemap']
+        self.tilemap = {}
+        for loc, tile in map_data['tilemap'].items():
+            x, y = loc.split(';')
+            self.tilemap[(int(x), int(y))] = tile
         self.tile_size = map_data['tile_size']
         self.offgrid_tiles = map_data['offgrid']
+        self.chunk_cache = {}
+        self.chunk_view = None
+        self.physics_cache = {}
 
     def extract(self, id_pairs, keep=False):
         """
@@ -77,6 +93,9 @@ class Tilemap:
                 matches[-1]['pos'][1] *= self.tile_size
                 if not keep:
                     del self.tilemap[loc]
+                    self.chunk_cache = {}
+                    self.chunk_view = None
+                    self.physics_cache = {}
 
         return matches
 
@@ -92,7 +111,7 @@ class Tilemap:
 
         # Access and return each tile around player in a 5x5 area
         for offset in NEIGHBOR_TILES:
-            current_tile = str(tile_loc[0] + offset[0]) + ';' + str(tile_loc[1] + offset[1])
+            current_tile = (tile_loc[0] + offset[0], tile_loc[1] + offset[1])
             if current_tile in self.tilemap:
                 output_tiles.append(self.tilemap[current_tile])
 
@@ -102,11 +121,17 @@ class Tilemap:
         """
         Determines if tiles given from tiles_nearby should act as collision
         Returns a Rect list of nearby tiles to pos
+        Lists are cached per grid location and shared between callers, they must not be modified
         """
+        tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        if tile_loc in self.physics_cache:
+            return self.physics_cache[tile_loc]
+
         output_rects = []
         for tile in self.tiles_nearby(pos):
             if tile['type'] in PHYSICS_TILES:
                 output_rects.append(pygame.Rect(tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size, self.tile_size, self.tile_size))
+        self.physics_cache[tile_loc] = output_rects
         return output_rects
     
     def tile_below(self, pos):
@@ -116,7 +141,7 @@ class Tilemap:
         # Convert pixel position to grid position with integer division
         below_tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
 
-        below_tile = str(below_tile_loc[0]) + ';' + str(below_tile_loc[1] + 1)
+        below_tile = (below_tile_loc[0], below_tile_loc[1] + 1)
         if below_tile in self.tilemap:
             return self.tilemap[below_tile]
         return None
@@ -126,7 +151,7 @@ class Tilemap:
         Returns the tile at given pos if solid
         Helper method for enemy movement back and forth, avoiding falling off an edge by detecting block in front
         """
-        tile_loc = str(int(pos[0] // self.tile_size)) + ';' + str(int(pos[1] // self.tile_size))
+        tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
         if tile_loc in self.tilemap:
             if self.tilemap[tile_loc]['type'] in PHYSICS_TILES:
                 return self.tilemap[tile_loc]
@@ -140,7 +165,7 @@ class Tilemap:
             tile = self.tilemap[loc]
             neighbors = set()
             for shift in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
-                check_loc = str(tile['pos'][0] + shift[0]) + ';' + str(tile['pos'][1] + shift[1])
+                check_loc = (tile['pos'][0] + shift[0], tile['pos'][1] + shift[1])
                 if check_loc in self.tilemap:
                     if self.tilemap[check_loc]['type'] == tile['type']:
                         neighbors.add(shift)
@@ -148,23 +173,72 @@ class Tilemap:
         # Apply autotiling rules based on neighbors
             if tile['type'] in AUTOTILE_TILES and neighbors in AUTOTILE_MAP:
                 tile['variant'] = AUTOTILE_MAP[neighbors]
+        self.chunk_cache = {}
+        self.chunk_view = None
 
-    def render(self, surf, offset=(0,0)):
+    def invalidate(self, tile_pos):
         """
-        Renders all tiles onscreen onto display with a camera offset
-        Background tiles are rendered before foreground ones
+        Drop cached chunks that the grid tile at tile_pos draws into
+        Must be called after placing or removing a grid tile outside of load/extract/autotile
         """
-        # Render background objects first
-        for tile in self.offgrid_tiles:
-            surf.blit(self.game.assets[tile['type']][tile['variant']], (tile['pos'][0] - offset[0], tile['pos'][1] - offset[1]))
+        chunk_x = tile_pos[0] // CHUNK_SIZE
+        chunk_y = tile_pos[1] // CHUNK_SIZE
+        for shift in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            self.chunk_cache.pop((chunk_x + shift[0], chunk_y + shift[1]), None)
+        self.chunk_view = None
+        self.physics_cache = {}
+
+    def render_chunk(self, chunk_loc):
+        """
+        Pre-render every grid tile drawing into the given chunk onto one colorkeyed Surface
+        Returns None if the chunk has nothing to draw
+        """
+        chunk_px = CHUNK_SIZE * self.tile_size
+        start_x = chunk_loc[0] * CHUNK_SIZE
+        start_y = chunk_loc[1] * CHUNK_SIZE
 
-        # Render tiles only if in range of camera (camera offset + screen dimension)
-        for x in range(offset[0] // self.tile_size, (offset[0] + surf.get_width()) // self.tile_size + 1):
-            for y in range(offset[1] // self.tile_size, (offset[1] + surf.get_height()) // self.tile_size + 1):
-                loc = str(x) + ';' + str(y)
+        # Same x-major, y-minor order as drawing tile by tile, so overlapping tiles stack identically
+        tile_blits = []
+        for x in range(start_x - CHUNK_OVERLAP, start_x + CHUNK_SIZE):
+            for y in range(start_y - CHUNK_OVERLAP, start_y + CHUNK_SIZE):
+                loc = (x, y)
                 if loc in self.tilemap:
                     tile = self.tilemap[loc]
-                    surf.blit(self.game.assets[tile['type']][tile['variant']], (tile['pos'][0] * self.tile_size - offset[0], tile['pos'][1] * self.tile_size - offset[1]))
+                    tile_blits.append((self.game.assets[tile['type']][tile['variant']], ((x - start_x) * self.tile_size, (y - start_y) * self.tile_size)))
+        if not tile_blits:
+            return None
 
-        
-            
\ No newline at end of file
+        # Tile images are colorkeyed on black, so a black colorkeyed chunk keeps the same transparency
+        chunk_surf = pygame.Surface((chunk_px, chunk_px)).convert()
+        chunk_surf.fill((0, 0, 0))
+        chunk_surf.fblits(tile_blits)
+        chunk_surf.set_colorkey((0, 0, 0))
+        return chunk_surf
+
+    def render(self, surf, offset=(0,0)):
+        """
+        Renders all tiles onscreen onto display with a camera offset
+        Background tiles are rendered before foreground ones
+        Grid tiles are drawn from pre-rendered chunks, blits are gathered into one fblits call per layer
+        The chunk blit list is reused while the integer camera offset stays the same
+        """
+        assets = self.game.assets
+
+        # Render background objects first
+        surf.fblits([(assets[tile['type']][tile['variant']], (tile['pos'][0] - offset[0], tile['pos'][1] - offset[1])) for tile in self.offgrid_tiles])
+
+        # Render cached tile chunks only if in range of camera (camera offset + screen dimension), building missing ones
+        view = (offset, surf.get_size())
+        if view != self.chunk_view:
+            chunk_px = CHUNK_SIZE * self.tile_size
+            self.chunk_blits = []
+            for chunk_x in range(offset[0] // chunk_px, (offset[0] + surf.get_width()) // chunk_px + 1):
+                for chunk_y in range(offset[1] // chunk_px, (offset[1] + surf.get_height()) // chunk_px + 1):
+                    chunk_loc = (chunk_x, chunk_y)
+                    if chunk_loc not in self.chunk_cache:
+                        self.chunk_cache[chunk_loc] = self.render_chunk(chunk_loc)
+                    chunk_surf = self.chunk_cache[chunk_loc]
+                    if chunk_surf is not None:
+                        self.chunk_blits.append((chunk_surf, (chunk_x * chunk_px - offset[0], chunk_y * chunk_px - offset[1])))
+            self.chunk_view = view
+        surf.fblits(self.chunk_blits)
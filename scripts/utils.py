@@ -2,6 +2,7 @@ import os
 import pygame
 
 BASE_IMG_PATH = 'images/'
+MIXER_MAX_VOLUME = 128                  # SDL_mixer volume steps, Sound volumes are stored in 1/128 increments
 
 def listdir_noinvis(path):
     """
@@ -11,11 +12,13 @@ def listdir_noinvis(path):
         if not file.startswith('.'):
             yield file
 
-def load_image(path):
+def load_image(path, alpha=True):
     """
-    Load single image
+    Load single image, converted to the display pixel format
+    Opaque images (alpha=False) skip per-pixel alpha for faster blits
     """
-    img = pygame.image.load(BASE_IMG_PATH + path).convert_alpha()
+    img = pygame.image.load(BASE_IMG_PATH + path)
+    img = img.convert_alpha() if alpha else img.convert()
     img.set_colorkey((0,0,0))
     return img
 
@@ -32,18 +35,29 @@ class Animation:
     """
     Control animation assets and frame data
     """
-    def __init__(self, images, img_dur=5, loop=False):
+    def __init__(self, images, img_dur=5, loop=False, variants=None):
         self.images = list(images)
         self.img_duration = img_dur
         self.loop = loop
         self.done = False
-        self.frame = 0
+        self.set_frame(0)
+
+        # Flipped/scaled frame lists keyed by (flip, vert_flip, scale), shared by every copy of this animation
+        self.variants = {} if variants is None else variants
 
     def copy(self):
         """
         Create and return copy of animation instance
         """
-        return Animation(self.images, self.img_duration, self.loop)
+        return Animation(self.images, self.img_duration, self.loop, self.variants)
+
+    def set_frame(self, frame):
+        """
+        Jump to a game frame and cache the image shown on it
+        """
+        self.frame = frame
+        self.index = int(frame / self.img_duration)
+        self.current = self.images[self.index]
     
     def update(self):
         """
@@ -61,8 +75,61 @@ class Animation:
             if self.frame >= total_animation_len - 1:
                 self.done = True
 
-    def img(self):
+        # Cache the current image so renders read an attribute instead of recomputing the index
+        self.index = int(self.frame / self.img_duration)
+        self.current = self.images[self.index]
+
+    def img(self, flip=False, vert_flip=False, scale=1.0):
         """
         Get current img of animation based on current game frame for render
+        Flipped or scaled frames are built once per variant and reused instead of transformed every frame
         """
-        return self.images[int(self.frame / self.img_duration)]
\ No newline at end of file
+        if not flip and not vert_flip and scale == 1.0:
+            return self.current
+
+        key = (flip, vert_flip, scale)
+        if key not in self.variants:
+            self.variants[key] = [pygame.transform.scale_by(pygame.transform.flip(img, flip, vert_flip), scale) for img in self.images]
+        return self.variants[key][self.index]
+
+class LazySound:
+    """
+    Stand-in for pygame.mixer.Sound that only reads and decodes the file on first play
+    Volume is tracked with the same 1/128 steps as SDL_mixer so get_volume() matches a loaded Sound
+    """
+    def __init__(self, path):
+        self.path = path
+        self.sound = None
+        self.volume = MIXER_MAX_VOLUME
+
+    def load(self):
+        """
+        Decode the sound file if not already loaded and apply the stored volume
+        """
+        if self.sound is None:
+            self.sound = pygame.mixer.Sound(self.path)
+            self.sound.set_volume(self.volume / MIXER_MAX_VOLUME)
+        return self.sound
+
+    def play(self, *args, **kwargs):
+        return self.load().play(*args, **kwargs)
+
+    def stop(self):
+        # Nothing can be playing before the first play()
+        if self.sound is not None:
+            self.sound.stop()
+
+    def fadeout(self, ms):
+        if self.sound is not None:
+            self.sound.fadeout(ms)
+
+    def set_volume(self, value):
+        # Negative steps are ignored and values above 1.0 clamp, same as SDL_mixer
+        volume = int(value * MIXER_MAX_VOLUME)
+        if volume >= 0:
+            self.volume = min(MIXER_MAX_VOLUME, volume)
+            if self.sound is not None:
+                self.sound.set_volume(self.volume / MIXER_MAX_VOLUME)
+
+    def get_volume(self):
+        return self.volume / MIXER_MAX_VOLUME